@@ -27,6 +27,17 @@ from routes.ai_routes import ai_bp
 from routes.publish_routes import publish_bp
 from routes.application_routes import application_bp
 from routes.upload_routes import upload_bp
+from services.opportunity_service import OpportunityService, opportunity_cache
+from services.related_service import related_index
+from services.opportunity_replica import opportunity_replica
+from services.engagement_service import engagement_buffer
+from services.draft_autosave_service import draft_autosave
+from services.moderation_queue import moderation_queue
+from services.algolia_outbox import algolia_indexer
+from utils.compression import response_cache
+from config.settings import (
+    OPPORTUNITY_REPLICA_ENABLED, DRAFT_AUTOSAVE_WINDOW, MODERATION_WORKERS, ALGOLIA_OUTBOX_INTERVAL
+)
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -110,6 +121,30 @@ app.register_blueprint(application_bp)
 app.register_blueprint(upload_bp)
 logger.info("All blueprints registered successfully")
 
+# Start the live replica of published opportunities
+if OPPORTUNITY_REPLICA_ENABLED:
+    opportunity_replica.start()
+else:
+    logger.info("Opportunity replica disabled, reading opportunities from Firestore directly")
+
+# Precompute related opportunities in the background once published data is available
+related_index.start_background_build(
+    lambda: OpportunityService.get_all_opportunities(status='published'),
+    wait_for=lambda: opportunity_replica.wait_until_ready(timeout=60) if OPPORTUNITY_REPLICA_ENABLED else True
+)
+
+# Flush buffered view/bookmark counters periodically and on shutdown
+engagement_buffer.start()
+
+# Write coalesced draft autosaves in the background
+draft_autosave.start(window=DRAFT_AUTOSAVE_WINDOW)
+
+# Moderate submissions on a worker pool, resuming any left pending by a restart
+moderation_queue.start(workers=MODERATION_WORKERS)
+
+# Push queued Algolia index operations in the background
+algolia_indexer.start(interval=ALGOLIA_OUTBOX_INTERVAL)
+
 # Debug: List all registered routes
 logger.info("Registered routes:")
 for rule in app.url_map.iter_rules():
@@ -121,7 +156,17 @@ for rule in app.url_map.iter_rules():
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "healthy", "service": "Depanku.id Backend"}), 200
+    return jsonify({
+        "status": "healthy",
+        "service": "Depanku.id Backend",
+        "cache": {
+            "opportunities": opportunity_cache.stats(),
+            "responses": response_cache.stats()
+        },
+        "replica": {"ready": opportunity_replica.is_ready, "size": len(opportunity_replica)},
+        "moderation": {"in_flight": moderation_queue.in_flight},
+        "algolia_outbox": {"last_error": algolia_indexer.last_error}
+    }), 200
 
 # CORS test endpoint
 @app.route('/api/test-cors', methods=['GET', 'POST', 'OPTIONS'])
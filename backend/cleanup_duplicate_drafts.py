@@ -2,6 +2,7 @@
 """
 Cleanup script to remove duplicate drafts for users.
 This script helps clean up the issue where multiple drafts were created due to auto-save.
+Drafts now use deterministic ids, so only drafts saved before that change can be duplicated.
 """
 
 import os
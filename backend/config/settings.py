@@ -29,6 +29,16 @@ db = firestore.client()
 ALGOLIA_APP_ID = os.getenv("ALGOLIA_APP_ID")
 ALGOLIA_ADMIN_API_KEY = os.getenv("ALGOLIA_ADMIN_API_KEY")
 ALGOLIA_INDEX_NAME = 'opportunities'
+# Override the REST host (e.g. a local stub); defaults to https://<app id>-dsn.algolia.net
+ALGOLIA_API_URL = os.getenv("ALGOLIA_API_URL") or None
+ALGOLIA_CONNECT_TIMEOUT = float(os.getenv('ALGOLIA_CONNECT_TIMEOUT', 5))
+ALGOLIA_READ_TIMEOUT = float(os.getenv('ALGOLIA_READ_TIMEOUT', 30))
+# Retries with exponential backoff on 429/5xx and connection errors
+ALGOLIA_MAX_RETRIES = int(os.getenv('ALGOLIA_MAX_RETRIES', 3))
+# Bulk sync: records and serialized bytes per /batch request, and parallel requests
+ALGOLIA_BULK_MAX_RECORDS = int(os.getenv('ALGOLIA_BULK_MAX_RECORDS', 1000))
+ALGOLIA_BULK_MAX_BYTES = int(os.getenv('ALGOLIA_BULK_MAX_BYTES', 5 * 1024 * 1024))
+ALGOLIA_BULK_CONCURRENCY = int(os.getenv('ALGOLIA_BULK_CONCURRENCY', 4))
 
 if ALGOLIA_APP_ID and ALGOLIA_ADMIN_API_KEY:
     algolia_client = SearchClient(
@@ -54,3 +64,24 @@ brevo_api_instance = TransactionalEmailsApi(brevo_python.ApiClient(brevo_configu
 # App Configuration
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
 
+# Cache Configuration
+OPPORTUNITY_CACHE_SIZE = int(os.getenv('OPPORTUNITY_CACHE_SIZE', 2048))
+OPPORTUNITY_CACHE_TTL = int(os.getenv('OPPORTUNITY_CACHE_TTL', 300))
+OPPORTUNITY_REPLICA_ENABLED = os.getenv('OPPORTUNITY_REPLICA_ENABLED', 'true').lower() == 'true'
+
+# Engagement Counters
+ENGAGEMENT_FLUSH_INTERVAL = float(os.getenv('ENGAGEMENT_FLUSH_INTERVAL', 30))
+
+# Draft Autosave
+DRAFT_AUTOSAVE_WINDOW = float(os.getenv('DRAFT_AUTOSAVE_WINDOW', 2))
+
+# Background Moderation
+MODERATION_WORKERS = int(os.getenv('MODERATION_WORKERS', 4))
+# When to ask Gemini after the local lexicon pre-filter: 'ambiguous', 'always' or 'never'
+MODERATION_LLM_MODE = os.getenv('MODERATION_LLM_MODE', 'ambiguous').lower()
+# Approximate prompt tokens per batched moderation call
+MODERATION_BATCH_TOKEN_BUDGET = int(os.getenv('MODERATION_BATCH_TOKEN_BUDGET', 8000))
+
+# Algolia Outbox
+ALGOLIA_OUTBOX_INTERVAL = float(os.getenv('ALGOLIA_OUTBOX_INTERVAL', 5))
+
@@ -1,8 +1,98 @@
 """Opportunity data models and schemas"""
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Optional, Tuple
+from datetime import datetime, time, timedelta, timezone
 from dataclasses import dataclass, asdict
 
+# Deadlines entered as plain dates are interpreted in Western Indonesia Time
+DEADLINE_TIMEZONE = timezone(timedelta(hours=7))
+
+def parse_deadline(deadline, has_indefinite_deadline=False) -> Optional[datetime]:
+    """
+    Normalize a free-form deadline into an aware UTC timestamp
+    
+    Args:
+        deadline: ISO date/datetime string, datetime, "indefinite" or empty
+        has_indefinite_deadline: Opportunity flag; forces None when set
+        
+    Returns:
+        UTC datetime (end of day for date-only values), or None if the deadline
+        is indefinite, missing or unparseable
+    """
+    if has_indefinite_deadline or not deadline:
+        return None
+    if isinstance(deadline, datetime):
+        parsed = deadline
+    else:
+        value = str(deadline).strip()
+        if not value or value.lower() == 'indefinite':
+            return None
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if len(value) == 10:
+            # Date only: the opportunity closes at the end of that day
+            parsed = datetime.combine(parsed.date(), time(23, 59, 59))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=DEADLINE_TIMEZONE)
+    return parsed.astimezone(timezone.utc)
+
+def parse_deadline_bound(value, end_of_day=False) -> datetime:
+    """
+    Parse a deadline window bound (deadline_from/deadline_to) into an aware UTC timestamp
+    
+    Args:
+        value: ISO date or datetime string
+        end_of_day: For date-only values, use the end of the day instead of its start
+        
+    Raises:
+        ValueError: If the value is not an ISO date or datetime
+    """
+    text = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError as e:
+        raise ValueError(f"Invalid deadline bound: {value}. Use an ISO date or datetime") from e
+    if len(text) == 10:
+        parsed = datetime.combine(parsed.date(), time(23, 59, 59) if end_of_day else time.min)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=DEADLINE_TIMEZONE)
+    return parsed.astimezone(timezone.utc)
+
+# order_by values accepted by the paginated opportunity list
+LIST_ORDER_BY = ('deadline', 'createdAt')
+
+def resolve_list_window(order_by=None, deadline_from=None, deadline_to=None,
+                        now: Optional[datetime] = None) -> Tuple[Optional[str], Optional[datetime], Optional[datetime]]:
+    """
+    Validate list ordering and deadline window arguments
+    
+    A window is a range filter on deadline_at, so it forces ordering by deadline.
+    Ordering by deadline without a window starts at now: indefinite deadlines are
+    stored as null, which Firestore sorts before every date, and "soonest first"
+    should list open opportunities rather than indefinite and expired ones.
+    
+    Returns:
+        Tuple of (order_by, window start, window end); bounds are aware UTC datetimes or None
+        
+    Raises:
+        ValueError: On an unknown order_by, a window combined with another ordering,
+                    an unparseable bound or an empty window
+    """
+    if order_by is not None and order_by not in LIST_ORDER_BY:
+        raise ValueError(f"Invalid order_by: {order_by}. Must be one of {list(LIST_ORDER_BY)}")
+    if deadline_from or deadline_to:
+        if order_by not in (None, 'deadline'):
+            raise ValueError("A deadline window can only be combined with order_by=deadline")
+        order_by = 'deadline'
+    window_from = parse_deadline_bound(deadline_from) if deadline_from else None
+    window_to = parse_deadline_bound(deadline_to, end_of_day=True) if deadline_to else None
+    if window_from and window_to and window_from > window_to:
+        raise ValueError("deadline_from must not be after deadline_to")
+    if order_by == 'deadline' and not (window_from or window_to):
+        window_from = now or datetime.now(timezone.utc)
+    return order_by, window_from, window_to
+
 @dataclass
 class SocialMediaLinks:
     """Social media links for an opportunity"""
@@ -30,6 +120,7 @@ class Opportunity:
     created_by_email: Optional[str] = None  # User email for reference
     location: Optional[str] = None
     deadline: Optional[str] = None  # ISO format or "indefinite"
+    deadline_at: Optional[datetime] = None  # Normalized from deadline at write time
     url: Optional[str] = None
     social_media: Optional[dict] = None
     benefits: Optional[str] = None
@@ -39,8 +130,9 @@ class Opportunity:
     application_process: Optional[str] = None
     contact_email: Optional[str] = None
     has_indefinite_deadline: bool = False
-    status: str = "published"  # 'draft', 'published', 'rejected'
+    status: str = "published"  # 'draft', 'pending_moderation', 'published', 'rejected'
     moderation_notes: Optional[str] = None
+    moderation_issues: Optional[List[str]] = None
     application_form: Optional[dict] = None  # Custom application form data
     images: Optional[List[str]] = None  # List of image URLs or base64 strings
     additional_info: Optional[dict] = None  # Custom fields
@@ -50,6 +142,28 @@ class Opportunity:
         # Clean up None values
         return {k: v for k, v in data.items() if v is not None}
 
+# Fields returned by paginated list queries - enough to render an OpportunityCard
+# without shipping base64 images, application forms or moderation data
+CARD_FIELDS = [
+    "title", "description", "type", "organization", "tags", "location",
+    "deadline", "deadline_at", "has_indefinite_deadline", "url", "cost", "duration",
+    "status", "createdAt", "created_by_uid"
+]
+
+# Moderation state written only by the server; stripped from client payloads so
+# a submission cannot carry its own verdict
+MODERATION_FIELDS = (
+    "moderation_notes", "moderation_issues", "moderation_job_id",
+    "moderation_hash", "moderation_approved", "moderatedAt"
+)
+
+# Fields an owner may change through field-level draft autosave deltas;
+# ownership, status and derived fields are managed by the server
+DRAFT_EDITABLE_FIELDS = frozenset(
+    name for name in Opportunity.__dataclass_fields__
+    if name not in ("created_by_uid", "created_by_email", "deadline_at", "status") + MODERATION_FIELDS
+)
+
 # Opportunity templates
 OPPORTUNITY_TEMPLATES = {
     "research": {
@@ -1,25 +1,107 @@
 """Opportunity routes"""
-from flask import Blueprint, request, jsonify
-from services.opportunity_service import OpportunityService
-from services.moderation_service import ModerationService
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from datetime import datetime, timezone
+import uuid
+from services.opportunity_service import OpportunityService, DEFAULT_PAGE_SIZE, MAX_BATCH_IDS
+from services.moderation_queue import moderation_queue
 from services.opportunity_publish_service import OpportunityPublishService
 from services.application_service import ApplicationService
-from models.opportunity import OPPORTUNITY_TEMPLATES, TAG_PRESETS
-from utils.decorators import require_auth
+from services.facet_service import FacetService
+from services.related_service import DEFAULT_TOP_K
+from services.engagement_service import EngagementService
+from services.draft_autosave_service import draft_autosave, parse_delta
+from models.opportunity import OPPORTUNITY_TEMPLATES, TAG_PRESETS, DRAFT_EDITABLE_FIELDS, MODERATION_FIELDS
+from utils.decorators import require_auth, optional_auth
+from utils.compression import cached_json_response
+from utils.http_cache import compute_etag, conditional_json, is_not_modified, not_modified_response
 from utils.logging_config import logger
 from config.settings import db
 
 opportunity_bp = Blueprint('opportunities', __name__, url_prefix='/api/opportunities')
 
+# Query parameters that select the paginated, filtered list mode
+LIST_QUERY_PARAMS = (
+    'limit', 'cursor', 'type', 'tags', 'organization',
+    'deadline_from', 'deadline_to', 'order_by'
+)
+
+# Templates and presets are static, so their ETags are computed once
+TEMPLATES_ETAG = compute_etag(OPPORTUNITY_TEMPLATES)
+TAG_PRESETS_ETAG = compute_etag(TAG_PRESETS)
+
+# Suggested delay between moderation status polls
+MODERATION_POLL_SECONDS = 2
+
+def _build_opportunity_list():
+    """Build the GET /api/opportunities payload for the current query args"""
+    if any(param in request.args for param in LIST_QUERY_PARAMS):
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        tags = [tag.strip() for tag in request.args.get('tags', '').split(',') if tag.strip()]
+        opportunities, next_cursor = OpportunityService.list_opportunities(
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            type=request.args.get('type'),
+            tags=tags or None,
+            organization=request.args.get('organization'),
+            deadline_from=request.args.get('deadline_from'),
+            deadline_to=request.args.get('deadline_to'),
+            order_by=request.args.get('order_by')
+        )
+        return {
+            "success": True,
+            "data": opportunities,
+            "next_cursor": next_cursor
+        }
+    
+    return {
+        "success": True,
+        "data": OpportunityService.get_all_opportunities(status='published')
+    }
+
+def _moderation_accepted(opportunity_id):
+    """202 response for an opportunity queued for background moderation"""
+    response = jsonify({
+        "success": True,
+        "status": "pending_moderation",
+        "id": opportunity_id,
+        "message": "Your opportunity is being reviewed",
+        "moderation_url": f"/api/opportunities/{opportunity_id}/moderation"
+    })
+    response.headers['Location'] = f"/api/opportunities/{opportunity_id}/moderation"
+    response.headers['Retry-After'] = str(MODERATION_POLL_SECONDS)
+    return response, 202
+
 @opportunity_bp.route('', methods=['GET'])
 def get_opportunities():
-    """Get all opportunities from Firestore"""
+    """
+    Get published opportunities
+    
+    Passing any of LIST_QUERY_PARAMS switches to paginated mode: only published
+    opportunities with card fields are returned, together with `next_cursor`.
+    Supported filters: type, tags (comma-separated, any match), organization,
+    deadline_from/deadline_to (ISO dates) and order_by (deadline or createdAt).
+    Responses carry an ETag derived from the collection version, so unchanged
+    lists are answered with 304 before anything is read or serialized, and the
+    compressed body is cached until that version changes.
+    """
     try:
-        opportunities = OpportunityService.get_all_opportunities()
+        version, last_modified = OpportunityService.get_collection_version()
+        if version:
+            # Only the args the payload depends on: cache-busters like ?_=<ts> must
+            # not each store another copy of the catalogue
+            endpoint = ('opportunities', tuple(
+                (param, request.args.get(param)) for param in LIST_QUERY_PARAMS if param in request.args
+            ))
+            etag = compute_etag([endpoint, version])
+            return cached_json_response(endpoint, version, _build_opportunity_list,
+                                        etag=etag, last_modified=last_modified)
+        
+        return jsonify(_build_opportunity_list()), 200
+    except ValueError as e:
         return jsonify({
-            "success": True,
-            "data": opportunities
-        }), 200
+            "success": False,
+            "error": str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             "success": False,
@@ -32,6 +114,8 @@ def create_opportunity(user_id: str, user_email: str):
     """Create a new opportunity with AI moderation"""
     try:
         data = request.json
+        for field in MODERATION_FIELDS:
+            data.pop(field, None)
         
         # Add user tracking
         data['created_by_uid'] = user_id
@@ -41,69 +125,37 @@ def create_opportunity(user_id: str, user_email: str):
         is_draft = data.get('status') == 'draft'
         
         if is_draft:
-            # Check for existing draft with same title by same user
-            existing_draft = OpportunityService.find_draft_by_title(user_id, data.get('title', ''))
+            # Drafts are upserted by deterministic id, so autosaves never duplicate
+            draft_id = data.pop('draft_id', None)
+            doc_id, created = OpportunityService.save_draft(user_id, data, client_draft_id=draft_id)
             
-            if existing_draft:
-                # Update existing draft instead of creating new one
-                data['status'] = 'draft'
-                OpportunityService.update_opportunity(existing_draft['id'], data)
-                
-                logger.info(f"Existing draft updated: {existing_draft['id']} by {user_email}")
-                
-                return jsonify({
-                    "success": True,
-                    "status": "draft",
-                    "id": existing_draft['id'],
-                    "message": "Draft updated successfully"
-                }), 200
-            else:
-                # Create new draft
-                data['status'] = 'draft'
-                doc_id, _ = OpportunityService.create_opportunity(data)
-                
+            if created:
                 logger.info(f"New draft created: {doc_id} by {user_email}")
-                
-                return jsonify({
-                    "success": True,
-                    "status": "draft",
-                    "id": doc_id,
-                    "message": "Draft saved successfully"
-                }), 201
-        else:
-            # Moderate content with AI for published submissions
-            is_approved, issues = ModerationService.moderate_opportunity(data)
-            
-            if not is_approved:
-                # Save as rejected with moderation notes
-                data['status'] = 'rejected'
-                data['moderation_notes'] = ModerationService.get_moderation_summary(issues)
-                doc_id, _ = OpportunityService.create_opportunity(data)
-                
-                logger.info(f"Opportunity rejected by moderation: {doc_id}")
-                
-                return jsonify({
-                    "success": False,
-                    "status": "rejected",
-                    "id": doc_id,
-                    "message": "Your opportunity needs revision",
-                    "issues": issues,
-                    "moderation_notes": data['moderation_notes']
-                }), 400
-            
-            # Content approved, create as published
-            data['status'] = 'published'
-            doc_id, algolia_data = OpportunityService.create_opportunity(data)
-            
-            logger.info(f"Opportunity created and published: {doc_id} by {user_email}")
+            else:
+                logger.info(f"Existing draft updated: {doc_id} by {user_email}")
             
             return jsonify({
                 "success": True,
-                "status": "published",
+                "status": "draft",
                 "id": doc_id,
-                "data": algolia_data
-            }), 201
+                "message": "Draft saved successfully" if created else "Draft updated successfully"
+            }), 201 if created else 200
+        else:
+            # Save as pending and moderate in the background
+            data['status'] = 'pending_moderation'
+            data['moderation_job_id'] = uuid.uuid4().hex
+            doc_id, _ = OpportunityService.create_opportunity(data)
+            moderation_queue.submit(doc_id, data['moderation_job_id'])
+            
+            logger.info(f"Opportunity created and queued for moderation: {doc_id} by {user_email}")
+            
+            return _moderation_accepted(doc_id)
         
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Error creating opportunity: {str(e)}")
         return jsonify({
@@ -111,6 +163,184 @@ def create_opportunity(user_id: str, user_email: str):
             "error": str(e)
         }), 500
 
+@opportunity_bp.route('/search', methods=['GET'])
+def search_opportunities():
+    """
+    Full-text search over published opportunities without Algolia
+    
+    Query params: q (required), limit, type
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({
+                "success": False,
+                "error": "Query parameter 'q' is required"
+            }), 400
+        
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        results = OpportunityService.search_opportunities(query, limit=limit, type=request.args.get('type'))
+        
+        return jsonify({
+            "success": True,
+            "data": results,
+            "source": "local"
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error searching opportunities: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@opportunity_bp.route('/closing-soon', methods=['GET'])
+def get_closing_soon():
+    """
+    Get published opportunities closing within the next N days, soonest first
+    
+    Query params: days (default 7), limit
+    """
+    try:
+        days = int(request.args.get('days', 7))
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        opportunities = OpportunityService.get_closing_soon(days=days, limit=limit)
+        
+        return jsonify({
+            "success": True,
+            "data": opportunities
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error fetching closing-soon opportunities: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@opportunity_bp.route('/facets', methods=['GET'])
+def get_facets():
+    """Get published opportunity counts per type and per tag"""
+    try:
+        return jsonify({
+            "success": True,
+            "data": FacetService.get_facets()
+        }), 200
+    except Exception as e:
+        logger.error(f"Error fetching opportunity facets: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@opportunity_bp.route('/batch', methods=['POST'])
+def get_opportunities_batch():
+    """
+    Get several opportunities by ID in one request
+    
+    Expected JSON payload:
+    {
+        "ids": ["id1", "id2", ...]
+    }
+    
+    `data` is aligned with `ids` (null for misses) and `missing` lists the misses.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        
+        if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+            return jsonify({
+                "success": False,
+                "error": "ids must be a list of strings"
+            }), 400
+        
+        if len(ids) > MAX_BATCH_IDS:
+            return jsonify({
+                "success": False,
+                "error": f"At most {MAX_BATCH_IDS} ids can be requested at once"
+            }), 400
+        
+        opportunities = OpportunityService.get_opportunities_by_ids(ids)
+        missing = [opportunity_id for opportunity_id, opp in zip(ids, opportunities) if opp is None]
+        
+        return jsonify({
+            "success": True,
+            "data": opportunities,
+            "missing": list(dict.fromkeys(missing))
+        }), 200
+    except Exception as e:
+        logger.error(f"Error fetching opportunity batch: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@opportunity_bp.route('/export.ndjson', methods=['GET'])
+@optional_auth
+def export_opportunities(user_id: str, user_email: str):
+    """
+    Stream opportunities as newline-delimited JSON
+    
+    Query params:
+        status: published (default), draft, rejected or all; anything other than
+                published requires auth and only exports the caller's opportunities
+        updated_since: ISO timestamp watermark; only documents updated at or after it
+    """
+    status = request.args.get('status', 'published')
+    if status not in ('published', 'draft', 'rejected', 'all'):
+        return jsonify({
+            "success": False,
+            "error": f"Invalid status: {status}"
+        }), 400
+    
+    if status != 'published' and not user_id:
+        return jsonify({
+            "success": False,
+            "message": "Unauthorized"
+        }), 401
+    
+    updated_since = request.args.get('updated_since')
+    if updated_since:
+        try:
+            updated_since = datetime.fromisoformat(updated_since.replace('Z', '+00:00'))
+        except ValueError:
+            return jsonify({
+                "success": False,
+                "error": f"Invalid updated_since: {updated_since}"
+            }), 400
+        if updated_since.tzinfo is None:
+            updated_since = updated_since.replace(tzinfo=timezone.utc)
+    
+    opportunities = OpportunityService.iter_opportunities(
+        status=None if status == 'all' else status,
+        updated_since=updated_since,
+        created_by_uid=None if status == 'published' else user_id
+    )
+    
+    def generate():
+        count = 0
+        try:
+            for opportunity in opportunities:
+                count += 1
+                yield current_app.json.dumps(opportunity) + '\n'
+        except Exception as e:
+            # Headers are already sent; end the stream with an error record
+            logger.error(f"Error exporting opportunities after {count} records: {str(e)}")
+            yield current_app.json.dumps({"error": str(e)}) + '\n'
+        else:
+            logger.info(f"Exported {count} opportunities as NDJSON")
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @opportunity_bp.route('/<opportunity_id>', methods=['GET'])
 def get_opportunity(opportunity_id):
     """Get a single opportunity by ID"""
@@ -118,10 +348,18 @@ def get_opportunity(opportunity_id):
         data = OpportunityService.get_opportunity_by_id(opportunity_id)
         
         if data:
-            return jsonify({
+            EngagementService.record_view(opportunity_id)
+            # Validators cover the content only; counters are approximate and change constantly
+            etag = compute_etag(data)
+            last_modified = data.get('updatedAt')
+            if is_not_modified(etag, last_modified):
+                # Revalidation: skip the counter read, the body is not sent
+                return not_modified_response(etag, last_modified)
+            data['engagement'] = EngagementService.get_counts(opportunity_id)
+            return conditional_json({
                 "success": True,
                 "data": data
-            }), 200
+            }, etag=etag, last_modified=last_modified)
         else:
             return jsonify({
                 "success": False,
@@ -139,27 +377,17 @@ def update_opportunity(opportunity_id, user_id: str, user_email: str):
     """Update an opportunity"""
     try:
         data = request.json
+        for field in MODERATION_FIELDS:
+            data.pop(field, None)
         
-        # Check if status is changing to published
+        # Publishing goes through background moderation
         if data.get('status') == 'published':
-            # Moderate content with AI for published submissions
-            is_approved, issues = ModerationService.moderate_opportunity(data)
+            data.pop('status')
+            OpportunityPublishService.request_moderation(opportunity_id, data)
             
-            if not is_approved:
-                # Update as rejected with moderation notes
-                data['status'] = 'rejected'
-                data['moderation_notes'] = ModerationService.get_moderation_summary(issues)
-                OpportunityService.update_opportunity(opportunity_id, data)
-                
-                logger.info(f"Opportunity update rejected by moderation: {opportunity_id}")
-                
-                return jsonify({
-                    "success": False,
-                    "status": "rejected",
-                    "message": "Your opportunity needs revision",
-                    "issues": issues,
-                    "moderation_notes": data['moderation_notes']
-                }), 400
+            logger.info(f"Opportunity update queued for moderation: {opportunity_id} by {user_email}")
+            
+            return _moderation_accepted(opportunity_id)
         
         # Update the opportunity
         OpportunityService.update_opportunity(opportunity_id, data)
@@ -177,6 +405,110 @@ def update_opportunity(opportunity_id, user_id: str, user_email: str):
             "error": str(e)
         }), 500
 
+@opportunity_bp.route('/<opportunity_id>/moderation', methods=['GET'])
+@require_auth
+def get_moderation_status(opportunity_id, user_id: str, user_email: str):
+    """Get the moderation state of the caller's opportunity (poll after a 202)"""
+    try:
+        data = OpportunityService.get_opportunity_by_id(opportunity_id)
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "Opportunity not found"
+            }), 404
+        if data.get('created_by_uid') != user_id:
+            return jsonify({
+                "success": False,
+                "error": "You can only view moderation of your own opportunities"
+            }), 403
+        
+        status = data.get('status')
+        response = jsonify({
+            "success": True,
+            "data": {
+                "id": opportunity_id,
+                "status": status,
+                "pending": status == 'pending_moderation',
+                "issues": data.get('moderation_issues', []),
+                "moderation_notes": data.get('moderation_notes', '')
+            }
+        })
+        if status == 'pending_moderation':
+            response.headers['Retry-After'] = str(MODERATION_POLL_SECONDS)
+        return response, 200
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@opportunity_bp.route('/<opportunity_id>/draft', methods=['PATCH'])
+@require_auth
+def autosave_draft(opportunity_id, user_id: str, user_email: str):
+    """
+    Autosave field-level changes to a draft
+    
+    Accepts a JSON Patch array or an object of changed top-level fields.
+    Changes are coalesced for a short window and written in one update;
+    pass ?flush=true to write immediately (e.g. before leaving the editor).
+    A flush that did not persist answers 503 (changes kept for a retry) or
+    409 (no longer an editable draft).
+    """
+    try:
+        current = OpportunityService.get_opportunity_by_id(opportunity_id)
+        if not current:
+            return jsonify({
+                "success": False,
+                "error": "Opportunity not found"
+            }), 404
+        if current.get('created_by_uid') != user_id:
+            return jsonify({
+                "success": False,
+                "error": "You can only edit your own drafts"
+            }), 403
+        if current.get('status') != 'draft':
+            return jsonify({
+                "success": False,
+                "error": "Only drafts can be autosaved"
+            }), 409
+        
+        changes = parse_delta(request.get_json(silent=True), DRAFT_EDITABLE_FIELDS)
+        flush_in = draft_autosave.submit(opportunity_id, user_id, changes, current=current)
+        
+        if request.args.get('flush', 'false').lower() == 'true' and flush_in is not None:
+            if not draft_autosave.flush(opportunity_id):
+                pending = draft_autosave.pending_paths(opportunity_id)
+                if pending:
+                    # The write failed; the changes stay buffered for the next attempt
+                    return jsonify({
+                        "success": False,
+                        "error": "Draft changes could not be saved, please retry",
+                        "pending": pending
+                    }), 503
+                return jsonify({
+                    "success": False,
+                    "error": "Only drafts can be autosaved"
+                }), 409
+            flush_in = None
+        
+        return jsonify({
+            "success": True,
+            "id": opportunity_id,
+            "pending": draft_autosave.pending_paths(opportunity_id),
+            "flush_in": round(flush_in, 2) if flush_in is not None else None
+        }), 202 if flush_in is not None else 200
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error autosaving draft {opportunity_id}: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @opportunity_bp.route('/<opportunity_id>', methods=['DELETE'])
 @require_auth
 def delete_opportunity(opportunity_id, user_id: str, user_email: str):
@@ -200,18 +532,18 @@ def delete_opportunity(opportunity_id, user_id: str, user_email: str):
 @opportunity_bp.route('/templates', methods=['GET'])
 def get_templates():
     """Get opportunity templates"""
-    return jsonify({
+    return cached_json_response('templates', TEMPLATES_ETAG, lambda: {
         "success": True,
         "data": OPPORTUNITY_TEMPLATES
-    }), 200
+    }, etag=TEMPLATES_ETAG)
 
 @opportunity_bp.route('/presets/tags', methods=['GET'])
 def get_tag_presets():
     """Get tag presets"""
-    return jsonify({
+    return cached_json_response('presets/tags', TAG_PRESETS_ETAG, lambda: {
         "success": True,
         "data": TAG_PRESETS
-    }), 200
+    }, etag=TAG_PRESETS_ETAG)
 
 @opportunity_bp.route('/my-opportunities', methods=['GET'])
 @require_auth
@@ -247,6 +579,29 @@ def get_my_opportunities(user_id: str, user_email: str):
             "error": str(e)
         }), 500
 
+@opportunity_bp.route('/<opportunity_id>/related', methods=['GET'])
+def get_related_opportunities(opportunity_id):
+    """Get published opportunities similar to this one (precomputed top-K)"""
+    try:
+        limit = int(request.args.get('limit', DEFAULT_TOP_K))
+        related = OpportunityService.get_related_opportunities(opportunity_id, limit=limit)
+        
+        return jsonify({
+            "success": True,
+            "data": related
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error fetching related opportunities: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @opportunity_bp.route('/<opportunity_id>/applications', methods=['GET'])
 @require_auth
 def get_opportunity_applications(user_id: str, user_email: str, opportunity_id: str):
@@ -176,11 +176,12 @@ def get_applications(user_id: str, user_email: str):
         from services.application_service import ApplicationService
         applications = ApplicationService.get_user_applications(user_id)
         
-        # Enrich applications with opportunity details
+        # Enrich applications with opportunity details fetched in one batch
+        opportunities = OpportunityService.get_opportunities_by_ids(
+            [app.get('opportunity_id') for app in applications]
+        )
         enriched_applications = []
-        for app in applications:
-            # Get opportunity details
-            opportunity = OpportunityService.get_opportunity_by_id(app.get('opportunity_id'))
+        for app, opportunity in zip(applications, opportunities):
             if opportunity:
                 app['opportunity_title'] = opportunity.get('title', 'Unknown Opportunity')
                 app['organization'] = opportunity.get('organization', 'Unknown Organization')
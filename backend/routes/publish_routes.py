@@ -60,7 +60,7 @@ def publish_opportunity_options(opportunity_id):
 @publish_bp.route('/<opportunity_id>/publish', methods=['POST'])
 @require_auth
 def publish_opportunity(opportunity_id, user_id: str, user_email: str):
-    """Publish a draft opportunity with AI moderation"""
+    """Submit a draft opportunity for publishing; moderation runs in the background"""
     try:
         logger.info(f"Publishing opportunity {opportunity_id} by user {user_email}")
         logger.info(f"Request method: {request.method}")
@@ -82,8 +82,14 @@ def publish_opportunity(opportunity_id, user_id: str, user_email: str):
         success, result = OpportunityPublishService.publish_opportunity(opportunity_id)
         
         if success:
-            logger.info(f"Opportunity published: {opportunity_id} by {user_email}")
-            return create_success_response("Opportunity published successfully", {"opportunity_id": opportunity_id})
+            logger.info(f"Opportunity submitted for publishing: {opportunity_id} by {user_email}")
+            response, status_code = create_success_response("Opportunity submitted for review", {
+                "opportunity_id": opportunity_id,
+                "status": result["status"],
+                "moderation_url": f"/api/opportunities/{opportunity_id}/moderation"
+            }, 202)
+            response.headers['Location'] = f"/api/opportunities/{opportunity_id}/moderation"
+            return response, status_code
         else:
             # Handle different types of failure responses
             if isinstance(result, dict):
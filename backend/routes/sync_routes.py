@@ -1,18 +1,21 @@
 """Sync routes"""
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from services.opportunity_service import OpportunityService
+from services.facet_service import FacetService
 
 sync_bp = Blueprint('sync', __name__, url_prefix='/api/sync')
 
 @sync_bp.route('/algolia', methods=['POST'])
 def sync_algolia():
-    """Sync all Firestore opportunities to Algolia"""
+    """Sync Firestore opportunities changed since the last run to Algolia (?full=true rebuilds)"""
     try:
-        count = OpportunityService.sync_to_algolia()
+        full = request.args.get('full', 'false').lower() == 'true'
+        result = OpportunityService.sync_to_algolia(full=full)
         
         return jsonify({
             "success": True,
-            "message": f"Synced {count} opportunities to Algolia"
+            "message": f"Synced {result['indexed']} opportunities to Algolia ({result['mode']})",
+            "data": result
         }), 200
     
     except Exception as e:
@@ -21,3 +24,20 @@ def sync_algolia():
             "error": str(e)
         }), 500
 
+@sync_bp.route('/facets', methods=['POST'])
+def reconcile_facets():
+    """Recount opportunity facets from Firestore and correct any drift"""
+    try:
+        result = FacetService.reconcile()
+        
+        return jsonify({
+            "success": True,
+            "message": f"Reconciled facets for {result['total']} published opportunities",
+            "data": result
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
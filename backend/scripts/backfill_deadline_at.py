@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Backfill script to populate the normalized deadline_at timestamp.
+Opportunities written before deadline_at existed only have the free-form deadline string.
+"""
+
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import db
+from models.opportunity import parse_deadline
+from utils.logging_config import logger
+
+BATCH_SIZE = 400
+
+def backfill_deadline_at(dry_run=True):
+    """Compute deadline_at for every opportunity whose stored value is missing or stale"""
+    logger.info("Starting deadline_at backfill...")
+    
+    batch = db.batch()
+    pending = 0
+    updated = 0
+    scanned = 0
+    
+    for doc in db.collection('opportunities').stream():
+        scanned += 1
+        data = doc.to_dict()
+        deadline_at = parse_deadline(data.get('deadline'), data.get('has_indefinite_deadline', False))
+        
+        if 'deadline_at' in data and data.get('deadline_at') == deadline_at:
+            continue
+        
+        print(f"  {doc.id}: {data.get('deadline')!r} -> {deadline_at.isoformat() if deadline_at else None}")
+        updated += 1
+        
+        if not dry_run:
+            batch.update(doc.reference, {'deadline_at': deadline_at})
+            pending += 1
+            if pending >= BATCH_SIZE:
+                batch.commit()
+                batch = db.batch()
+                pending = 0
+    
+    if not dry_run and pending:
+        batch.commit()
+    
+    if dry_run:
+        print(f"\nDRY RUN: Would update {updated} of {scanned} opportunities")
+        print("Run with --execute to write deadline_at")
+    else:
+        print(f"\nBackfill complete! Updated {updated} of {scanned} opportunities")
+
+def main():
+    """Main function"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Backfill normalized deadline_at timestamps")
+    parser.add_argument("--execute", action="store_true", help="Actually write updates (default is dry run)")
+    
+    args = parser.parse_args()
+    
+    print("deadline_at Backfill Tool")
+    print("=" * 40)
+    
+    try:
+        backfill_deadline_at(dry_run=not args.execute)
+    except Exception as e:
+        print(f"Error during backfill: {e}")
+        logger.error(f"Backfill failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Re-moderation sweep over stored opportunities.
+Useful after the moderation lexicon or prompt changes: verdicts are requested in
+batched model calls, and published opportunities that now fail are rejected.
+"""
+
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.moderation_service import ModerationService
+from services.opportunity_service import OpportunityService
+from utils.logging_config import logger
+
+PAGE_SIZE = 50
+
+def _process_page(page, dry_run):
+    """Moderate one page of opportunities; returns the number rejected"""
+    verdicts = ModerationService.moderate_many(page)
+    rejected = 0
+    for opportunity, (is_approved, issues) in zip(page, verdicts):
+        if is_approved:
+            continue
+        rejected += 1
+        print(f"  {opportunity['id']}: {opportunity.get('title')!r}")
+        for issue in issues:
+            print(f"    - {issue}")
+        if not dry_run:
+            changes = {
+                'status': 'rejected',
+                'moderation_notes': ModerationService.get_moderation_summary(issues),
+                'moderation_issues': issues,
+                **ModerationService.verdict_fields(opportunity)
+            }
+            OpportunityService.update_opportunity(opportunity['id'], changes)
+    return rejected
+
+def remoderate(status='published', dry_run=True, force=False):
+    """Moderate every opportunity with the given status in batches"""
+    logger.info(f"Starting re-moderation sweep over {status} opportunities...")
+
+    scanned = 0
+    rejected = 0
+    page = []
+    for opportunity in OpportunityService.iter_opportunities(status=status):
+        if force:
+            # Ignore verdicts persisted for unchanged content
+            opportunity.pop('moderation_hash', None)
+        scanned += 1
+        page.append(opportunity)
+        if len(page) >= PAGE_SIZE:
+            rejected += _process_page(page, dry_run)
+            page = []
+    if page:
+        rejected += _process_page(page, dry_run)
+
+    if dry_run:
+        print(f"\nDRY RUN: {rejected} of {scanned} opportunities would be rejected")
+        print("Run with --execute to reject them")
+    else:
+        print(f"\nSweep complete! Rejected {rejected} of {scanned} opportunities")
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-moderate stored opportunities in batches")
+    parser.add_argument("--status", default="published", help="Status to sweep (default: published)")
+    parser.add_argument("--force", action="store_true", help="Re-check content even if a verdict is stored for it")
+    parser.add_argument("--execute", action="store_true", help="Actually reject failing opportunities (default is dry run)")
+
+    args = parser.parse_args()
+
+    print("Re-moderation Sweep")
+    print("=" * 40)
+
+    try:
+        remoderate(status=args.status, dry_run=not args.execute, force=args.force)
+    except Exception as e:
+        print(f"Error during sweep: {e}")
+        logger.error(f"Re-moderation sweep failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -189,6 +189,7 @@ def seed_database():
         doc_ref = db.collection('opportunities').document()
         firestore_opp = opp.copy()
         firestore_opp['createdAt'] = firestore.SERVER_TIMESTAMP
+        firestore_opp['updatedAt'] = firestore.SERVER_TIMESTAMP
         doc_ref.set(firestore_opp)
         
         # Prepare for Algolia (without SERVER_TIMESTAMP sentinel)
@@ -0,0 +1,170 @@
+"""Algolia outbox - Index operations recorded with the Firestore write and pushed in the background"""
+import threading
+from typing import Dict, List, Optional
+from utils.logging_config import logger
+
+OUTBOX_COLLECTION = 'algolia_outbox'
+OUTBOX_ACTIONS = ('upsert', 'delete')
+# Entries read per drain pass
+DRAIN_LIMIT = 500
+# Operations per Algolia /batch request
+MAX_BATCH_OPERATIONS = 1000
+# Firestore batches are limited to 500 writes
+MAX_BATCH_WRITES = 400
+
+def _algolia_service():
+    try:
+        from services.algolia_service import algolia_service
+        return algolia_service
+    except (ValueError, ImportError):
+        return None
+
+def enqueue_index_op(writer, opportunity_id: str, action: str) -> bool:
+    """
+    Record an index operation in the same batch or transaction as the document write
+
+    Args:
+        writer: A Firestore WriteBatch or Transaction that is committed by the caller
+        action: 'upsert' to index the stored document, 'delete' to remove it
+
+    Returns:
+        False if Algolia is not configured and nothing was recorded
+    """
+    if action not in OUTBOX_ACTIONS:
+        raise ValueError(f"Unknown outbox action: {action}")
+    if _algolia_service() is None:
+        return False
+    from firebase_admin import firestore
+    from config.settings import db
+    writer.set(db.collection(OUTBOX_COLLECTION).document(), {
+        'objectID': opportunity_id,
+        'action': action,
+        'status': 'pending',
+        'createdAt': firestore.SERVER_TIMESTAMP
+    })
+    return True
+
+def coalesce_entries(entries: List[Dict]) -> Dict[str, str]:
+    """
+    Collapse outbox entries (oldest first) to the final action per objectID
+
+    Returns:
+        {objectID: action} where the latest entry for each object wins
+    """
+    actions = {}
+    for entry in entries:
+        object_id = entry.get('objectID')
+        if object_id and entry.get('action') in OUTBOX_ACTIONS:
+            # Re-insert so the dict keeps the order of the latest operations
+            actions.pop(object_id, None)
+            actions[object_id] = entry['action']
+    return actions
+
+class AlgoliaOutboxIndexer:
+    """
+    Drains pending outbox entries into batched Algolia requests.
+
+    Upserts read the current document when the batch is built, so a burst of
+    edits to one opportunity costs a single record push, and an entry whose
+    document is no longer published becomes a delete. Entries are only deleted
+    after Algolia accepted the batch; failures stay pending for the next pass.
+    """
+
+    def __init__(self, interval: float = 5):
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._drain_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+
+    def notify(self):
+        """Wake the indexer after a write has committed an outbox entry"""
+        self._wake.set()
+
+    def _pending_entries(self, limit: int):
+        from config.settings import db
+        return list(db.collection(OUTBOX_COLLECTION)
+                      .where('status', '==', 'pending')
+                      .order_by('createdAt')
+                      .limit(limit)
+                      .stream())
+
+    def _build_operations(self, service, actions: Dict[str, str]) -> List[Dict]:
+        from config.settings import db
+        upserts = [object_id for object_id, action in actions.items() if action == 'upsert']
+        stored = {}
+        if upserts:
+            refs = [db.collection('opportunities').document(object_id) for object_id in upserts]
+            stored = {doc.id: doc.to_dict() for doc in db.get_all(refs) if doc.exists}
+
+        operations = []
+        for object_id, action in actions.items():
+            data = stored.get(object_id) if action == 'upsert' else None
+            if data and data.get('status') == 'published':
+                operations.append(service.save_operation({**data, 'id': object_id, 'objectID': object_id}))
+            else:
+                operations.append(service.delete_operation(object_id))
+        return operations
+
+    def _delete_entries(self, snapshots):
+        from config.settings import db
+        for start in range(0, len(snapshots), MAX_BATCH_WRITES):
+            batch = db.batch()
+            for snapshot in snapshots[start:start + MAX_BATCH_WRITES]:
+                batch.delete(snapshot.reference)
+            batch.commit()
+
+    def drain(self, limit: int = DRAIN_LIMIT) -> int:
+        """Push one page of pending entries to Algolia; returns the number of entries completed"""
+        service = _algolia_service()
+        if service is None:
+            return 0
+        with self._drain_lock:
+            snapshots = self._pending_entries(limit)
+            if not snapshots:
+                return 0
+
+            actions = coalesce_entries([snapshot.to_dict() for snapshot in snapshots])
+            operations = self._build_operations(service, actions)
+            for start in range(0, len(operations), MAX_BATCH_OPERATIONS):
+                if not service.send_batch(operations[start:start + MAX_BATCH_OPERATIONS]):
+                    self.last_error = "Algolia batch request failed"
+                    # Entries stay pending; a partial push is repeated idempotently
+                    return 0
+
+            self._delete_entries(snapshots)
+            self.last_error = None
+            logger.info(f"Indexed {len(snapshots)} outbox entries as {len(operations)} Algolia operations")
+            if len(snapshots) >= limit:
+                self._wake.set()  # More entries are waiting
+            return len(snapshots)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.drain()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Algolia outbox drain failed: {str(e)}")
+
+    def start(self, interval: Optional[float] = None):
+        """Drain the outbox on a background thread, immediately and then every interval"""
+        if interval is not None:
+            self.interval = interval
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='algolia-outbox', daemon=True)
+        self._thread.start()
+        self._wake.set()  # Pick up entries left by a previous process
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+# Global instance
+algolia_indexer = AlgoliaOutboxIndexer()
@@ -1,10 +1,16 @@
 """Algolia service for search functionality"""
-from algoliasearch.search.client import SearchClient
-from config.settings import ALGOLIA_APP_ID, ALGOLIA_ADMIN_API_KEY, ALGOLIA_INDEX_NAME
+from config.settings import (
+    ALGOLIA_APP_ID, ALGOLIA_ADMIN_API_KEY, ALGOLIA_INDEX_NAME, ALGOLIA_API_URL,
+    ALGOLIA_CONNECT_TIMEOUT, ALGOLIA_READ_TIMEOUT, ALGOLIA_MAX_RETRIES,
+    ALGOLIA_BULK_MAX_RECORDS, ALGOLIA_BULK_MAX_BYTES, ALGOLIA_BULK_CONCURRENCY
+)
+from services.algolia_transport import AlgoliaTransport
 from utils.logging_config import logger
-import asyncio
-import concurrent.futures
-from typing import List, Dict, Any
+from datetime import datetime
+from typing import List, Dict, Any, Iterator
+
+# Operations per /batch request for bulk deletes
+MAX_BATCH_OPERATIONS = 1000
 
 class AlgoliaService:
     """Service for managing Algolia search operations"""
@@ -13,42 +19,15 @@ class AlgoliaService:
         if not ALGOLIA_APP_ID or not ALGOLIA_ADMIN_API_KEY:
             raise ValueError("Algolia configuration not found. Please set ALGOLIA_APP_ID and ALGOLIA_ADMIN_API_KEY environment variables.")
         
-        self.client = SearchClient(ALGOLIA_APP_ID, ALGOLIA_ADMIN_API_KEY)
         self.index_name = ALGOLIA_INDEX_NAME
-    
-    def _run_async_safely(self, coro):
-        """Safely run async operations in sync context"""
-        # For now, skip async operations entirely to avoid event loop issues
-        # and rely on the synchronous fallback
-        logger.warning("Skipping async operation to avoid event loop issues, using sync fallback")
-        return False
-    
-    async def save_objects_async(self, objects: List[Dict[str, Any]]) -> bool:
-        """Save objects to Algolia asynchronously"""
-        try:
-            await self.client.save_objects(
-                index_name=self.index_name,
-                objects=objects
-            )
-            logger.info(f"Successfully saved {len(objects)} objects to Algolia")
-            return True
-        except Exception as e:
-            logger.error(f"Error saving objects to Algolia: {str(e)}")
-            return False
-    
-    def save_objects(self, objects: List[Dict[str, Any]]) -> bool:
-        """Save objects to Algolia synchronously"""
-        # Try async approach first
-        async def _save():
-            return await self.save_objects_async(objects)
-        
-        result = self._run_async_safely(_save())
-        if result:
-            return result
-        
-        # Fallback: Use synchronous approach if async fails
-        logger.warning("Async save failed, trying synchronous fallback")
-        return self._save_objects_sync(objects)
+        # Shared keep-alive session for every REST call made by this process
+        self.transport = AlgoliaTransport(
+            ALGOLIA_APP_ID, ALGOLIA_ADMIN_API_KEY,
+            base_url=ALGOLIA_API_URL,
+            connect_timeout=ALGOLIA_CONNECT_TIMEOUT,
+            read_timeout=ALGOLIA_READ_TIMEOUT,
+            max_retries=ALGOLIA_MAX_RETRIES
+        )
     
     def _clean_data_for_algolia(self, obj: Dict[str, Any]) -> Dict[str, Any]:
         """Clean data for Algolia by removing large fields that cause payload issues"""
@@ -87,6 +66,11 @@ class AlgoliaService:
             if field in cleaned:
                 del cleaned[field]
         
+        # Firestore timestamps are not JSON serializable
+        for key, value in cleaned.items():
+            if isinstance(value, datetime):
+                cleaned[key] = value.isoformat()
+        
         # Truncate very long text fields
         text_fields = ['description', 'benefits', 'eligibility', 'application_process']
         for field in text_fields:
@@ -95,166 +79,122 @@ class AlgoliaService:
         
         return cleaned
 
-    def _save_objects_sync(self, objects: List[Dict[str, Any]]) -> bool:
-        """Synchronous fallback for saving objects to Algolia"""
+    def save_objects(self, objects: List[Dict[str, Any]]) -> bool:
+        """Save objects to Algolia in one /batch request"""
         try:
-            # Use the synchronous client if available
-            import requests
-            import json
-            
-            url = f"https://{ALGOLIA_APP_ID}-dsn.algolia.net/1/indexes/{self.index_name}/batch"
-            headers = {
-                'X-Algolia-API-Key': ALGOLIA_ADMIN_API_KEY,
-                'X-Algolia-Application-Id': ALGOLIA_APP_ID,
-                'Content-Type': 'application/json'
-            }
-            
-            # Prepare batch operations with cleaned data
-            operations = []
-            for obj in objects:
-                cleaned_obj = self._clean_data_for_algolia(obj)
-                operations.append({
-                    "action": "addObject",
-                    "body": cleaned_obj
-                })
-            
-            payload = {"requests": operations}
-            
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
-            response.raise_for_status()
+            operations = [self.save_operation(obj) for obj in objects]
+            self.transport.batch(self.index_name, operations)
             
-            logger.info(f"Successfully saved {len(objects)} objects to Algolia (sync fallback)")
+            logger.info(f"Successfully saved {len(objects)} objects to Algolia")
             return True
             
         except Exception as e:
-            logger.error(f"Sync fallback also failed: {str(e)}")
+            logger.error(f"Error saving objects to Algolia: {str(e)}")
             return False
     
-    async def delete_objects_async(self, object_ids: List[str]) -> bool:
-        """Delete objects from Algolia asynchronously"""
+    def save_operation(self, obj: Dict[str, Any]) -> Dict[str, Any]:
+        """Batch operation that adds or replaces a record"""
+        return {"action": "addObject", "body": self._clean_data_for_algolia(obj)}
+    
+    def delete_operation(self, object_id: str) -> Dict[str, Any]:
+        """Batch operation that deletes a record"""
+        return {"action": "deleteObject", "body": {"objectID": object_id}}
+    
+    def send_batch(self, operations: List[Dict[str, Any]]) -> bool:
+        """Send mixed add/delete operations in one /batch request"""
         try:
-            await self.client.delete_objects(
-                index_name=self.index_name,
-                object_ids=object_ids
-            )
-            logger.info(f"Successfully deleted {len(object_ids)} objects from Algolia")
+            self.transport.batch(self.index_name, operations)
+            logger.info(f"Sent {len(operations)} batch operations to Algolia")
             return True
+            
         except Exception as e:
-            logger.error(f"Error deleting objects from Algolia: {str(e)}")
+            logger.error(f"Algolia batch request failed: {str(e)}")
             return False
     
+    def browse_object_ids(self) -> Iterator[str]:
+        """Yield the objectID of every record in the index"""
+        for hit in self.transport.browse(self.index_name, {'attributesToRetrieve': ['objectID']}):
+            yield hit['objectID']
+    
     def delete_objects(self, object_ids: List[str]) -> bool:
-        """Delete objects from Algolia synchronously"""
-        async def _delete():
-            return await self.delete_objects_async(object_ids)
+        """
+        Delete objects from Algolia, MAX_BATCH_OPERATIONS per request
         
-        return self._run_async_safely(_delete())
-    
-    async def sync_all_async(self, opportunities: List[Dict[str, Any]]) -> int:
-        """Sync all opportunities to Algolia asynchronously"""
-        try:
-            # Prepare objects for Algolia
-            objects = []
-            for opp in opportunities:
-                algolia_obj = opp.copy()
-                algolia_obj['objectID'] = opp.get('id', opp.get('objectID'))
-                algolia_obj['id'] = opp.get('id', opp.get('objectID'))  # Ensure id field matches objectID
-                
-                # Convert datetime objects to ISO strings
-                if 'createdAt' in algolia_obj and algolia_obj['createdAt']:
-                    if hasattr(algolia_obj['createdAt'], 'isoformat'):
-                        algolia_obj['createdAt'] = algolia_obj['createdAt'].isoformat()
-                    else:
-                        algolia_obj['createdAt'] = str(algolia_obj['createdAt'])
-                
-                objects.append(algolia_obj)
-            
-            if objects:
-                await self.client.save_objects(
-                    index_name=self.index_name,
-                    objects=objects
-                )
-                logger.info(f"Successfully synced {len(objects)} opportunities to Algolia")
-                return len(objects)
-            else:
-                logger.info("No opportunities to sync to Algolia")
-                return 0
-                
-        except Exception as e:
-            logger.error(f"Error syncing opportunities to Algolia: {str(e)}")
-            return 0
+        Returns:
+            True if every chunk was accepted; later chunks are still sent after a failure
+        """
+        object_ids = list(dict.fromkeys(object_id for object_id in object_ids if object_id))
+        success = True
+        for start in range(0, len(object_ids), MAX_BATCH_OPERATIONS):
+            chunk = object_ids[start:start + MAX_BATCH_OPERATIONS]
+            if not self.send_batch([self.delete_operation(object_id) for object_id in chunk]):
+                logger.error(f"Failed to delete {len(chunk)} objects from Algolia")
+                success = False
+        if success and object_ids:
+            logger.info(f"Successfully deleted {len(object_ids)} objects from Algolia")
+        return success
     
     def sync_all(self, opportunities: List[Dict[str, Any]]) -> int:
-        """Sync all opportunities to Algolia synchronously"""
-        # Try async approach first
-        async def _sync():
-            return await self.sync_all_async(opportunities)
-        
-        result = self._run_async_safely(_sync())
-        if result is not False and result is not None:
-            return result
-        
-        # Fallback: Use synchronous approach if async fails
-        logger.warning("Async sync_all failed, trying synchronous fallback")
-        return self._sync_all_sync(opportunities)
+        """Sync all opportunities to Algolia, returning how many were indexed"""
+        return self.bulk_index(opportunities)['indexed']
     
-    def _sync_all_sync(self, opportunities: List[Dict[str, Any]]) -> int:
-        """Synchronous fallback for syncing all opportunities to Algolia"""
+    def bulk_index(self, opportunities: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Index opportunities in size-bounded chunks sent in parallel
+        
+        Returns:
+            Dict with indexed and failed record counts, and one outcome per chunk
+            (see AlgoliaTransport.bulk_batch)
+        """
+        report = {"indexed": 0, "failed": 0, "chunks": []}
         try:
             # Prepare objects for Algolia
-            objects = []
+            operations = []
             for opp in opportunities:
                 algolia_obj = opp.copy()
                 algolia_obj['objectID'] = opp.get('id', opp.get('objectID'))
                 algolia_obj['id'] = opp.get('id', opp.get('objectID'))
                 
-                # Convert datetime objects to ISO strings
-                if 'createdAt' in algolia_obj and algolia_obj['createdAt']:
-                    if hasattr(algolia_obj['createdAt'], 'isoformat'):
-                        algolia_obj['createdAt'] = algolia_obj['createdAt'].isoformat()
-                
-                if 'deadline' in algolia_obj and algolia_obj['deadline']:
-                    if hasattr(algolia_obj['deadline'], 'isoformat'):
-                        algolia_obj['deadline'] = algolia_obj['deadline'].isoformat()
-                
-                # Clean the object for Algolia (remove large fields)
-                cleaned_obj = self._clean_data_for_algolia(algolia_obj)
-                objects.append(cleaned_obj)
+                # Clean the object for Algolia (remove large fields, ISO dates)
+                operations.append(self.save_operation(algolia_obj))
             
-            if not objects:
+            if not operations:
                 logger.warning("No objects to sync to Algolia")
-                return 0
+                return report
             
-            # Use the synchronous save method
-            success = self._save_objects_sync(objects)
-            if success:
-                logger.info(f"Successfully synced {len(objects)} opportunities to Algolia (sync fallback)")
-                return len(objects)
-            else:
-                logger.error("Failed to sync opportunities to Algolia (sync fallback)")
-                return 0
-                
+            outcomes = self.transport.bulk_batch(
+                self.index_name, operations,
+                max_records=ALGOLIA_BULK_MAX_RECORDS,
+                max_bytes=ALGOLIA_BULK_MAX_BYTES,
+                concurrency=ALGOLIA_BULK_CONCURRENCY
+            )
         except Exception as e:
-            logger.error(f"Error in sync_all fallback: {str(e)}")
-            return 0
+            # Includes AlgoliaFatalError (bad key, missing index): nothing was indexed reliably
+            logger.error(f"Error in bulk index: {str(e)}")
+            report["failed"] = len(opportunities)
+            report["error"] = str(e)
+            return report
+        
+        report["chunks"] = outcomes
+        report["indexed"] = sum(outcome["records"] for outcome in outcomes if outcome["success"])
+        report["failed"] = len(operations) - report["indexed"]
+        for outcome in outcomes:
+            if not outcome["success"]:
+                logger.error(f"Algolia rejected chunk of {outcome['records']} records after "
+                             f"{outcome['attempts']} attempts: {outcome['error']}")
+        logger.info(f"Bulk indexed {report['indexed']} of {len(operations)} opportunities "
+                    f"in {len(outcomes)} chunks")
+        return report
     
-    async def clear_index_async(self) -> bool:
-        """Clear all objects from the Algolia index"""
+    def clear_index(self) -> bool:
+        """Clear all objects from the Algolia index, keeping its settings"""
         try:
-            # Use the client's clear_objects method directly
-            await self.client.clear_objects(index_name=self.index_name)
+            self.transport.clear(self.index_name)
             logger.info(f"Cleared all objects from Algolia index: {self.index_name}")
             return True
         except Exception as e:
             logger.error(f"Error clearing Algolia index: {str(e)}")
             return False
-    
-    def clear_index(self) -> bool:
-        """Clear all objects from the Algolia index synchronously"""
-        async def _clear():
-            return await self.clear_index_async()
-        
-        return self._run_async_safely(_clear())
 
 # Global instance
 algolia_service = AlgoliaService()
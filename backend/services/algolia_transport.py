@@ -0,0 +1,223 @@
+"""Algolia transport - Pooled keep-alive HTTP session for the Algolia REST API"""
+import concurrent.futures
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Algolia refused the payload itself: split the chunk to isolate the bad records
+REJECTED_STATUSES = (400, 413)
+# Bad or revoked key, or missing index: no chunk can succeed, so the run stops
+FATAL_STATUSES = (401, 403, 404)
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+# Connections kept open per host; matches the bulk sync concurrency headroom
+POOL_SIZE = 10
+# Bulk indexing: chunk bounds, parallel requests and whole-chunk retries
+DEFAULT_CHUNK_RECORDS = 1000
+DEFAULT_CHUNK_BYTES = 5 * 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+DEFAULT_CHUNK_RETRIES = 2
+
+def _operation_size(operation: Dict[str, Any]) -> int:
+    """Serialized size of one batch operation, including its separator"""
+    return len(json.dumps(operation, separators=(',', ':'), default=str).encode('utf-8')) + 1
+
+def chunk_operations(operations: List[Dict[str, Any]], max_records: int = DEFAULT_CHUNK_RECORDS,
+                     max_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Tuple[List[Dict[str, Any]], int]]:
+    """
+    Split batch operations into chunks bounded by record count and serialized size
+
+    Returns:
+        List of (operations, bytes); an operation larger than max_bytes gets a chunk of its own
+    """
+    chunks = []
+    current, size = [], 0
+    for operation in operations:
+        operation_size = _operation_size(operation)
+        if current and (len(current) >= max_records or size + operation_size > max_bytes):
+            chunks.append((current, size))
+            current, size = [], 0
+        current.append(operation)
+        size += operation_size
+    if current:
+        chunks.append((current, size))
+    return chunks
+
+class AlgoliaFatalError(Exception):
+    """Algolia refused the request for a reason no retry or split can fix"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _object_ids(operations: List[Dict[str, Any]]) -> List[str]:
+    return [operation.get('body', {}).get('objectID') for operation in operations]
+
+class AlgoliaTransport:
+    """
+    Sends Algolia REST calls over one pooled requests.Session.
+
+    Connections are kept alive between calls, so only the first request of a
+    process pays TCP and TLS setup. 429 and 5xx responses and connection
+    errors are retried with exponential backoff, honouring Retry-After. Every
+    operation Algolia batches is an idempotent add/delete, so POSTs are
+    retried too. The session is rebuilt after a fork (gunicorn workers).
+    """
+
+    def __init__(self, app_id: str, api_key: str, base_url: Optional[str] = None,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF):
+        self.base_url = (base_url or f"https://{app_id}-dsn.algolia.net").rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._headers = {
+            'X-Algolia-API-Key': api_key,
+            'X-Algolia-Application-Id': app_id,
+            'Content-Type': 'application/json'
+        }
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._pid = None
+
+    def _get_session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                retry = Retry(
+                    total=self.max_retries,
+                    backoff_factor=self.backoff,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=None,  # Retry POST as well
+                    respect_retry_after_header=True,
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.headers.update(self._headers)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+                self._pid = os.getpid()
+            return self._session
+
+    def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send one API call and return the decoded JSON body; raises on a final error status"""
+        response = self._get_session().request(
+            method, f"{self.base_url}{path}", json=payload, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json() if response.content else {}
+
+    @staticmethod
+    def _index_path(index_name: str, action: str) -> str:
+        return f"/1/indexes/{quote(index_name, safe='')}/{action}"
+
+    def batch(self, index_name: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply add/delete operations in one /batch call"""
+        return self.request('POST', self._index_path(index_name, 'batch'), {"requests": operations})
+
+    def clear(self, index_name: str) -> Dict[str, Any]:
+        """Delete every record in the index, keeping its settings"""
+        return self.request('POST', self._index_path(index_name, 'clear'))
+
+    def search(self, index_name: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run one search query against the index"""
+        return self.request('POST', self._index_path(index_name, 'query'), dict(params or {}))
+
+    def browse(self, index_name: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield every record in the index, following the browse cursor"""
+        payload = dict(params or {})
+        while True:
+            page = self.request('POST', self._index_path(index_name, 'browse'), payload)
+            yield from page.get('hits', [])
+            cursor = page.get('cursor')
+            if not cursor:
+                return
+            payload = {'cursor': cursor}
+
+    def bulk_batch(self, index_name: str, operations: List[Dict[str, Any]],
+                   max_records: int = DEFAULT_CHUNK_RECORDS, max_bytes: int = DEFAULT_CHUNK_BYTES,
+                   concurrency: int = DEFAULT_CONCURRENCY,
+                   chunk_retries: int = DEFAULT_CHUNK_RETRIES) -> List[Dict[str, Any]]:
+        """
+        Send operations as size-bounded /batch chunks with bounded concurrency
+
+        A chunk that still fails after the transport's own retries is sent again
+        up to chunk_retries times. A chunk whose payload Algolia refuses (400 or
+        413) is split in half until the offending records are isolated, so one
+        bad record only fails itself. Any other 4xx fails the chunk as is.
+
+        Raises:
+            AlgoliaFatalError: On 401/403/404; chunks not yet sent are cancelled
+
+        Returns:
+            One outcome per chunk sent: records, bytes, success, attempts, and
+            for failures the error, objectIDs and whether Algolia rejected them
+        """
+        chunks = chunk_operations(operations, max_records, max_bytes)
+        if not chunks:
+            return []
+        abort = threading.Event()
+        workers = max(1, min(concurrency, len(chunks)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='algolia-bulk') as pool:
+            futures = [pool.submit(self._send_chunk, index_name, chunk, size, chunk_retries, abort)
+                       for chunk, size in chunks]
+            try:
+                return [outcome for future in futures for outcome in future.result()]
+            except AlgoliaFatalError:
+                abort.set()
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _send_chunk(self, index_name: str, operations: List[Dict[str, Any]], size: int,
+                    chunk_retries: int, abort: threading.Event) -> List[Dict[str, Any]]:
+        attempts = 0
+        while True:
+            if abort.is_set():
+                # Another chunk hit a fatal error; the run is raising it
+                return [{
+                    "records": len(operations), "bytes": size, "success": False, "attempts": attempts,
+                    "error": "aborted", "rejected": False, "objectIDs": _object_ids(operations)
+                }]
+            attempts += 1
+            try:
+                self.batch(index_name, operations)
+                return [{"records": len(operations), "bytes": size, "success": True, "attempts": attempts}]
+            except requests.RequestException as e:
+                status = e.response.status_code if e.response is not None else None
+                if status in FATAL_STATUSES:
+                    abort.set()
+                    raise AlgoliaFatalError(status, str(e)) from e
+                rejected = status in REJECTED_STATUSES
+                if rejected and len(operations) > 1:
+                    middle = len(operations) // 2
+                    outcomes = []
+                    for half in (operations[:middle], operations[middle:]):
+                        half_size = sum(_operation_size(operation) for operation in half)
+                        outcomes.extend(self._send_chunk(index_name, half, half_size, chunk_retries, abort))
+                    return outcomes
+                other_client_error = status is not None and 400 <= status < 500 and status != 429
+                if rejected or other_client_error or attempts > chunk_retries:
+                    return [{
+                        "records": len(operations), "bytes": size, "success": False, "attempts": attempts,
+                        "error": str(e), "rejected": rejected, "objectIDs": _object_ids(operations)
+                    }]
+            time.sleep(self.backoff * (2 ** attempts))
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
@@ -0,0 +1,281 @@
+"""Draft autosave - Field-level deltas coalesced per draft before a single Firestore update"""
+import atexit
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from utils.logging_config import logger
+
+DEFAULT_AUTOSAVE_WINDOW = 2.0
+MAX_DELTA_PATHS = 100
+
+# Marks a field path removed by a JSON Patch "remove" operation
+DELETE = object()
+
+_SEGMENT_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def _unescape_pointer(segment: str) -> str:
+    return segment.replace('~1', '/').replace('~0', '~')
+
+def parse_delta(body: Any, editable_fields) -> Dict[str, Any]:
+    """
+    Turn a request body into {field_path: value} changes
+
+    Accepts either a JSON Patch list (add/replace/remove with paths such as
+    "/title" or "/social_media/twitter") or a plain object mapping top-level
+    fields to their new values. Array elements cannot be addressed; send the
+    whole array instead.
+
+    Raises:
+        ValueError: If the body is malformed or touches a field that is not editable
+    """
+    if isinstance(body, dict):
+        operations = [{'op': 'replace', 'path': '/' + str(key), 'value': value} for key, value in body.items()]
+    elif isinstance(body, list):
+        operations = body
+    else:
+        raise ValueError("Body must be a JSON Patch array or an object of field changes")
+
+    if not operations:
+        raise ValueError("No changes provided")
+    if len(operations) > MAX_DELTA_PATHS:
+        raise ValueError(f"At most {MAX_DELTA_PATHS} changes per request")
+
+    changes = {}
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise ValueError("Each patch operation must be an object")
+        op = operation.get('op')
+        path = operation.get('path')
+        if op not in ('add', 'replace', 'remove'):
+            raise ValueError(f"Unsupported patch operation: {op}")
+        if not isinstance(path, str) or not path.startswith('/') or path == '/':
+            raise ValueError(f"Invalid patch path: {path}")
+
+        segments = [_unescape_pointer(segment) for segment in path[1:].split('/')]
+        if segments[0] not in editable_fields:
+            raise ValueError(f"Field cannot be edited: {segments[0]}")
+        for segment in segments[1:]:
+            if not _SEGMENT_RE.match(segment):
+                raise ValueError(f"Invalid patch path: {path}")
+
+        field_path = '.'.join(segments)
+        if op == 'remove':
+            changes[field_path] = DELETE
+        else:
+            if 'value' not in operation:
+                raise ValueError(f"Missing value for {path}")
+            changes[field_path] = operation['value']
+
+    return changes
+
+def _merge_changes(pending: Dict[str, Any], changes: Dict[str, Any]):
+    """Merge new field-path changes into pending ones, latest write winning"""
+    for path, value in changes.items():
+        # A write to a parent replaces everything buffered beneath it
+        prefix = path + '.'
+        for buffered in [p for p in pending if p.startswith(prefix)]:
+            del pending[buffered]
+        # A write beneath a buffered parent value edits that value in place
+        parent = next((p for p in pending if path.startswith(p + '.')), None)
+        if parent is not None:
+            if not isinstance(pending[parent], dict):
+                if value is DELETE:
+                    continue
+                pending[parent] = {}
+            target = pending[parent]
+            keys = path[len(parent) + 1:].split('.')
+            for key in keys[:-1]:
+                if not isinstance(target.get(key), dict):
+                    target[key] = {}
+                target = target[key]
+            if value is DELETE:
+                target.pop(keys[-1], None)
+            else:
+                target[keys[-1]] = value
+            continue
+        pending[path] = value
+
+_MISSING = object()
+
+def _value_at(document: dict, path: str):
+    value = document
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+def _drop_unchanged(changes: Dict[str, Any], current: dict, pending: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop changes that match the stored document, unless a buffered change touches the same path"""
+    def touches_pending(path):
+        return any(p == path or p.startswith(path + '.') or path.startswith(p + '.') for p in pending)
+
+    result = {}
+    for path, value in changes.items():
+        stored = _value_at(current, path)
+        unchanged = stored is _MISSING if value is DELETE else stored == value
+        if not unchanged or touches_pending(path):
+            result[path] = value
+    return result
+
+def _firestore_writer(opportunity_id: str, user_id: str, changes: Dict[str, Any]) -> bool:
+    """Apply coalesced changes with one update, only while the document is still the user's draft"""
+    from firebase_admin import firestore
+    from config.settings import db
+    from models.opportunity import parse_deadline
+    from services.opportunity_service import opportunity_cache
+
+    doc_ref = db.collection('opportunities').document(opportunity_id)
+    update = {path: firestore.DELETE_FIELD if value is DELETE else value for path, value in changes.items()}
+
+    @firestore.transactional
+    def _apply(transaction):
+        snapshot = doc_ref.get(transaction=transaction)
+        current = snapshot.to_dict() if snapshot.exists else None
+        if not current or current.get('status') != 'draft' or current.get('created_by_uid') != user_id:
+            return False
+        if 'deadline' in changes or 'has_indefinite_deadline' in changes:
+            merged = {**current, **{k: v for k, v in changes.items() if '.' not in k and v is not DELETE}}
+            update['deadline_at'] = parse_deadline(merged.get('deadline'), merged.get('has_indefinite_deadline', False))
+        update['updatedAt'] = firestore.SERVER_TIMESTAMP
+        transaction.update(doc_ref, update)
+        return True
+
+    applied = _apply(db.transaction())
+    opportunity_cache.invalidate(opportunity_id)
+    return applied
+
+class DraftAutosaveBuffer:
+    """
+    Coalesces field-level draft changes per opportunity.
+
+    The first change to a draft opens a window; everything submitted for that
+    draft until the window closes is merged and written with one update.
+    """
+
+    def __init__(self, window: float = DEFAULT_AUTOSAVE_WINDOW,
+                 writer: Callable[[str, str, Dict[str, Any]], bool] = _firestore_writer):
+        self.window = window
+        self._writer = writer
+        # Store: {opportunity_id: {'user_id': str, 'changes': {path: value}, 'due': monotonic}}
+        self._pending: Dict[str, dict] = {}
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def submit(self, opportunity_id: str, user_id: str, changes: Dict[str, Any],
+               current: Optional[dict] = None) -> Optional[float]:
+        """
+        Buffer changes for the owner's draft
+
+        Args:
+            current: Stored document, used to drop changes that would not alter it
+
+        Returns:
+            Seconds until the buffered changes are written, or None if nothing is pending
+        """
+        now = time.monotonic()
+        with self._condition:
+            entry = self._pending.get(opportunity_id)
+            if current is not None:
+                changes = _drop_unchanged(changes, current, entry['changes'] if entry else {})
+            if not changes:
+                return max(entry['due'] - now, 0.0) if entry else None
+            if entry is None:
+                entry = {'user_id': user_id, 'changes': {}, 'due': now + self.window}
+                self._pending[opportunity_id] = entry
+                self._condition.notify()
+            _merge_changes(entry['changes'], changes)
+            return max(entry['due'] - now, 0.0)
+
+    def pending_paths(self, opportunity_id: str):
+        """Field paths buffered for a draft and not yet written"""
+        with self._condition:
+            entry = self._pending.get(opportunity_id)
+            return sorted(entry['changes']) if entry else []
+
+    def flush(self, opportunity_id: Optional[str] = None) -> int:
+        """Write buffered changes now, for one draft or all of them; returns drafts written"""
+        with self._condition:
+            if opportunity_id is None:
+                entries, self._pending = self._pending, {}
+            else:
+                entry = self._pending.pop(opportunity_id, None)
+                entries = {opportunity_id: entry} if entry else {}
+        return sum(1 for key, entry in entries.items() if self._flush_entry(key, entry))
+
+    def discard(self, opportunity_id: str):
+        """Forget buffered changes for a draft that is being deleted"""
+        with self._condition:
+            self._pending.pop(opportunity_id, None)
+
+    def flush_due(self) -> int:
+        """Write every draft whose window has closed"""
+        now = time.monotonic()
+        with self._condition:
+            due = {key: entry for key, entry in self._pending.items() if entry['due'] <= now}
+            for key in due:
+                del self._pending[key]
+        return sum(1 for key, entry in due.items() if self._flush_entry(key, entry))
+
+    def _flush_entry(self, opportunity_id: str, entry: dict) -> bool:
+        if not entry['changes']:
+            return False
+        try:
+            applied = self._writer(opportunity_id, entry['user_id'], entry['changes'])
+            if not applied:
+                logger.warning(f"Dropped autosave for {opportunity_id}: no longer an editable draft")
+            return applied
+        except Exception as e:
+            logger.error(f"Error writing autosave for {opportunity_id}: {str(e)}")
+            self._requeue(opportunity_id, entry)
+            return False
+
+    def _requeue(self, opportunity_id: str, entry: dict):
+        """Put changes that failed to write back for the next window, under any newer ones"""
+        with self._condition:
+            newer = self._pending.get(opportunity_id)
+            changes = dict(entry['changes'])
+            if newer is not None:
+                _merge_changes(changes, newer['changes'])
+            self._pending[opportunity_id] = {
+                'user_id': entry['user_id'],
+                'changes': changes,
+                'due': newer['due'] if newer is not None else time.monotonic() + self.window
+            }
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                if self._pending:
+                    timeout = min(entry['due'] for entry in self._pending.values()) - time.monotonic()
+                else:
+                    timeout = None
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+            self.flush_due()
+
+    def start(self, window: Optional[float] = None):
+        """Start the background writer and flush whatever is left on interpreter shutdown"""
+        if window is not None:
+            self.window = window
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='draft-autosave', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the background writer and write all buffered changes"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self.flush()
+
+# Global instance
+draft_autosave = DraftAutosaveBuffer()
@@ -0,0 +1,195 @@
+"""Engagement service - Write-behind view/bookmark counters for opportunities"""
+import atexit
+import random
+import threading
+from collections import Counter
+from firebase_admin import firestore
+from config.settings import db, ENGAGEMENT_FLUSH_INTERVAL
+from utils.cache import TTLCache
+from utils.logging_config import logger
+
+COUNTER_FIELDS = ('views', 'bookmarks')
+NUM_SHARDS = 10
+SHARDS_COLLECTION = 'counter_shards'
+# Firestore batches are limited to 500 writes
+MAX_BATCH_WRITES = 500
+
+# Aggregated shard totals per opportunity, refreshed at most once a minute
+_totals_cache = TTLCache(maxsize=4096, ttl=60)
+# Last totals read successfully, served when the shards cannot be read
+_last_known_totals = TTLCache(maxsize=4096, ttl=24 * 60 * 60)
+
+@firestore.transactional
+def _write_shards(transaction, chunk):
+    """
+    Add deltas to one random shard per opportunity, skipping deleted opportunities
+
+    Reading the parents in the transaction means a concurrent delete either
+    sees the new shard (and removes it) or makes this write skip it.
+
+    Returns:
+        Set of opportunity ids whose deltas were written
+    """
+    refs = [db.collection('opportunities').document(opportunity_id) for opportunity_id, _ in chunk]
+    existing = {doc.id for doc in db.get_all(refs, field_paths=['status'], transaction=transaction) if doc.exists}
+    for opportunity_id, deltas in chunk:
+        if opportunity_id not in existing:
+            logger.debug(f"Dropping engagement deltas for deleted opportunity {opportunity_id}")
+            continue
+        shard_ref = db.collection('opportunities').document(opportunity_id)\
+                      .collection(SHARDS_COLLECTION).document(str(random.randrange(NUM_SHARDS)))
+        transaction.set(shard_ref, {field: firestore.Increment(delta) for field, delta in deltas.items()}, merge=True)
+    return existing
+
+class EngagementCounterBuffer:
+    """
+    Aggregates counter increments in memory and flushes them periodically.
+
+    Each flush adds the buffered deltas to one random shard document per
+    (opportunity, flush), so hot opportunities spread writes over NUM_SHARDS
+    documents instead of contending on one. Deltas for opportunities that no
+    longer exist are dropped rather than recreating their shards.
+    """
+
+    def __init__(self, flush_interval: float = 30):
+        self.flush_interval = flush_interval
+        # Store: {(opportunity_id, field): delta}
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def increment(self, opportunity_id: str, field: str, amount: int = 1):
+        """Buffer an increment; nothing is written until the next flush"""
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown counter: {field}")
+        if not opportunity_id or not amount:
+            return
+        with self._lock:
+            self._pending[(opportunity_id, field)] += amount
+
+    def pending(self, opportunity_id: str) -> dict:
+        """Return increments for one opportunity that have not been flushed yet"""
+        with self._lock:
+            return {field: self._pending.get((opportunity_id, field), 0) for field in COUNTER_FIELDS}
+
+    def discard(self, opportunity_id: str):
+        """Forget unflushed increments for an opportunity"""
+        with self._lock:
+            for field in COUNTER_FIELDS:
+                self._pending.pop((opportunity_id, field), None)
+
+    def flush(self) -> int:
+        """Write buffered increments to sharded counters; returns the number of shard writes"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, Counter()
+
+            per_opportunity = {}
+            for (opportunity_id, field), delta in pending.items():
+                if delta:
+                    per_opportunity.setdefault(opportunity_id, {})[field] = delta
+            if not per_opportunity:
+                return 0
+
+            writes = 0
+            items = list(per_opportunity.items())
+            for start in range(0, len(items), MAX_BATCH_WRITES):
+                chunk = items[start:start + MAX_BATCH_WRITES]
+                try:
+                    written = _write_shards(db.transaction(), chunk)
+                    writes += len(written)
+                    for opportunity_id, deltas in chunk:
+                        if opportunity_id not in written:
+                            continue
+                        cached = _totals_cache.get(opportunity_id)
+                        if cached is not None:
+                            _totals_cache.set(opportunity_id, {
+                                field: cached.get(field, 0) + deltas.get(field, 0) for field in COUNTER_FIELDS
+                            })
+                except Exception as e:
+                    # Put the deltas back so they are retried on the next flush
+                    logger.error(f"Error flushing engagement counters: {str(e)}")
+                    with self._lock:
+                        for opportunity_id, deltas in chunk:
+                            for field, delta in deltas.items():
+                                self._pending[(opportunity_id, field)] += delta
+
+            if writes:
+                logger.debug(f"Flushed engagement counters for {writes} opportunities")
+            return writes
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Engagement flusher error: {str(e)}")
+
+    def start(self):
+        """Start the periodic flusher and flush once more on interpreter shutdown"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='engagement-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing engagement counters on shutdown: {str(e)}")
+
+# Global instance
+engagement_buffer = EngagementCounterBuffer(flush_interval=ENGAGEMENT_FLUSH_INTERVAL)
+
+class EngagementService:
+    """Service for opportunity engagement counters"""
+
+    @staticmethod
+    def record_view(opportunity_id):
+        engagement_buffer.increment(opportunity_id, 'views')
+
+    @staticmethod
+    def record_bookmark(opportunity_id, added=True):
+        engagement_buffer.increment(opportunity_id, 'bookmarks', 1 if added else -1)
+
+    @staticmethod
+    def get_counts(opportunity_id):
+        """
+        Get flushed shard totals plus this process's unflushed increments
+
+        If the shards cannot be read, the last known totals (or zeros) are used
+        so a counter outage never fails the request.
+        """
+        totals = _totals_cache.get(opportunity_id)
+        if totals is None:
+            try:
+                totals = {field: 0 for field in COUNTER_FIELDS}
+                shards = db.collection('opportunities').document(opportunity_id)\
+                           .collection(SHARDS_COLLECTION).stream()
+                for shard in shards:
+                    data = shard.to_dict()
+                    for field in COUNTER_FIELDS:
+                        totals[field] += data.get(field, 0)
+                _totals_cache.set(opportunity_id, totals)
+                _last_known_totals.set(opportunity_id, totals)
+            except Exception as e:
+                logger.warning(f"Error reading engagement counters for {opportunity_id}: {str(e)}")
+                totals = _last_known_totals.get(opportunity_id) or {field: 0 for field in COUNTER_FIELDS}
+
+        pending = engagement_buffer.pending(opportunity_id)
+        return {field: max(totals.get(field, 0) + pending[field], 0) for field in COUNTER_FIELDS}
+
+    @staticmethod
+    def delete_counts(opportunity_id):
+        """Drop the counter shards of a deleted opportunity"""
+        engagement_buffer.discard(opportunity_id)
+        _totals_cache.invalidate(opportunity_id)
+        _last_known_totals.invalidate(opportunity_id)
+        shards = db.collection('opportunities').document(opportunity_id).collection(SHARDS_COLLECTION)
+        for shard in shards.list_documents():
+            shard.delete()
@@ -0,0 +1,163 @@
+"""Facet service - Incrementally maintained tag/type counts for published opportunities"""
+import threading
+import time
+from collections import Counter
+from firebase_admin import firestore
+from config.settings import db
+from models.opportunity import OPPORTUNITY_TEMPLATES, TAG_PRESETS
+from utils.logging_config import logger
+
+FACETS_DOC_PATH = ('stats', 'opportunity_facets')
+FACETS_CACHE_TTL = 60
+
+def _facets_ref():
+    return db.collection(FACETS_DOC_PATH[0]).document(FACETS_DOC_PATH[1])
+
+def _facet_values(opportunity):
+    """Return (type, tags) counted for an opportunity, or None if it is not published"""
+    if not opportunity or opportunity.get('status') != 'published':
+        return None
+    tags = opportunity.get('tags') or []
+    if not isinstance(tags, list):
+        tags = []
+    return opportunity.get('type'), set(tag for tag in tags if isinstance(tag, str) and tag)
+
+class FacetService:
+    """Service for tag and type facet counts"""
+
+    _cache = None
+    _cache_loaded_at = 0.0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def record_change(before, after):
+        """
+        Apply the facet delta between two versions of an opportunity
+
+        Args:
+            before: Opportunity data before the write (None if it did not exist)
+            after: Opportunity data after the write (None if deleted)
+        """
+        type_delta = Counter()
+        tag_delta = Counter()
+        total_delta = 0
+
+        for opportunity, sign in ((before, -1), (after, 1)):
+            values = _facet_values(opportunity)
+            if values is None:
+                continue
+            opp_type, tags = values
+            total_delta += sign
+            if opp_type:
+                type_delta[opp_type] += sign
+            for tag in tags:
+                tag_delta[tag] += sign
+
+        type_delta = {k: v for k, v in type_delta.items() if v}
+        tag_delta = {k: v for k, v in tag_delta.items() if v}
+        if not (type_delta or tag_delta or total_delta):
+            return
+
+        try:
+            update = {
+                'types': {k: firestore.Increment(v) for k, v in type_delta.items()},
+                'tags': {k: firestore.Increment(v) for k, v in tag_delta.items()},
+                'updatedAt': firestore.SERVER_TIMESTAMP
+            }
+            if total_delta:
+                update['total'] = firestore.Increment(total_delta)
+            _facets_ref().set(update, merge=True)
+        except Exception as e:
+            # Counts drift until the next reconcile, but the write itself succeeded
+            logger.error(f"Error updating opportunity facets: {str(e)}")
+            return
+
+        with FacetService._lock:
+            cache = FacetService._cache
+            if cache is not None:
+                for k, v in type_delta.items():
+                    cache['types'][k] = cache['types'].get(k, 0) + v
+                for k, v in tag_delta.items():
+                    cache['tags'][k] = cache['tags'].get(k, 0) + v
+                cache['total'] += total_delta
+
+    @staticmethod
+    def get_facets():
+        """Get facet counts, served from memory and refreshed every FACETS_CACHE_TTL seconds"""
+        with FacetService._lock:
+            if FacetService._cache is not None and time.monotonic() - FacetService._cache_loaded_at < FACETS_CACHE_TTL:
+                return FacetService._format(FacetService._cache)
+
+        doc = _facets_ref().get()
+        data = doc.to_dict() if doc.exists else {}
+        cache = {
+            'types': dict(data.get('types', {})),
+            'tags': dict(data.get('tags', {})),
+            'total': data.get('total', 0)
+        }
+
+        with FacetService._lock:
+            FacetService._cache = cache
+            FacetService._cache_loaded_at = time.monotonic()
+            return FacetService._format(cache)
+
+    @staticmethod
+    def _format(cache):
+        """Copy counts, filling in zeros for every known type and preset tag"""
+        types = {opp_type: 0 for opp_type in OPPORTUNITY_TEMPLATES}
+        types.update({k: v for k, v in cache['types'].items() if v > 0})
+        tags = {tag: 0 for tag in TAG_PRESETS}
+        tags.update({k: v for k, v in cache['tags'].items() if v > 0})
+        return {
+            'types': types,
+            'tags': tags,
+            'total': max(cache['total'], 0)
+        }
+
+    @staticmethod
+    def reconcile():
+        """
+        Recount facets from all published opportunities and overwrite the aggregate
+
+        Returns:
+            Dict with the recounted totals and how many counters had drifted
+        """
+        type_counts = Counter()
+        tag_counts = Counter()
+        total = 0
+
+        docs = db.collection('opportunities')\
+                 .where('status', '==', 'published')\
+                 .select(['type', 'tags', 'status'])\
+                 .stream()
+        for doc in docs:
+            data = doc.to_dict()
+            data['status'] = 'published'
+            opp_type, tags = _facet_values(data)
+            total += 1
+            if opp_type:
+                type_counts[opp_type] += 1
+            for tag in tags:
+                tag_counts[tag] += 1
+
+        previous = _facets_ref().get()
+        previous = previous.to_dict() if previous.exists else {}
+        drifted = sum(
+            1 for key, counts in (('types', type_counts), ('tags', tag_counts))
+            for name in set(counts) | set(previous.get(key, {}))
+            if counts.get(name, 0) != previous.get(key, {}).get(name, 0)
+        )
+
+        _facets_ref().set({
+            'types': dict(type_counts),
+            'tags': dict(tag_counts),
+            'total': total,
+            'updatedAt': firestore.SERVER_TIMESTAMP,
+            'reconciledAt': firestore.SERVER_TIMESTAMP
+        })
+
+        with FacetService._lock:
+            FacetService._cache = None
+
+        logger.info(f"Reconciled opportunity facets: {total} published, {drifted} counters corrected")
+        return {'total': total, 'drifted': drifted}
@@ -0,0 +1,174 @@
+"""In-process full-text search over published opportunities (Algolia fallback)"""
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
+from utils.logging_config import logger
+
+# Field weights: tokens of heavier fields are counted several times (simple BM25F)
+FIELD_WEIGHTS = {
+    'title': 3,
+    'organization': 2,
+    'tags': 2,
+    'description': 1,
+}
+
+# Fields kept per document to render search results without another read
+RESULT_FIELDS = ['title', 'description', 'type', 'organization', 'tags', 'location', 'deadline', 'thumbnail']
+
+STOPWORDS = {
+    # English
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have',
+    'in', 'is', 'it', 'its', 'of', 'on', 'or', 'our', 'that', 'the', 'this', 'to',
+    'we', 'will', 'with', 'you', 'your',
+    # Indonesian
+    'ada', 'adalah', 'agar', 'akan', 'anda', 'atau', 'bagi', 'dalam', 'dan', 'dapat',
+    'dari', 'dengan', 'di', 'hingga', 'ini', 'itu', 'juga', 'kami', 'karena', 'ke',
+    'kita', 'oleh', 'pada', 'para', 'sebagai', 'secara', 'serta', 'telah', 'tersebut',
+    'tidak', 'untuk', 'yang',
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, strip accents and split text into non-stopword tokens"""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii').lower()
+    return [token for token in _TOKEN_RE.findall(text) if token not in STOPWORDS]
+
+def _document_terms(doc: dict) -> Counter:
+    """Weighted term frequencies for a document"""
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = doc.get(field)
+        if isinstance(value, list):
+            value = ' '.join(str(item) for item in value)
+        for token in tokenize(value):
+            terms[token] += weight
+    return terms
+
+class LocalSearchIndex:
+    """Inverted index with BM25 scoring, updated incrementally per document"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # Store: {term: {doc_id: weighted_tf}}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._docs: Dict[str, dict] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+        self.is_built = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._docs)
+
+    def upsert(self, doc: dict):
+        """Index or re-index a published opportunity (must contain 'id' or 'objectID')"""
+        doc_id = doc.get('id') or doc.get('objectID')
+        if not doc_id:
+            return
+        terms = _document_terms(doc)
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, tf in terms.items():
+                self._postings[term][doc_id] = tf
+            self._doc_terms[doc_id] = terms
+            length = sum(terms.values())
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+            stored = {field: doc.get(field) for field in RESULT_FIELDS if doc.get(field) is not None}
+            stored['id'] = doc_id
+            images = doc.get('images')
+            if 'thumbnail' not in stored and isinstance(images, list) and images \
+                    and str(images[0]).startswith('http'):
+                stored['thumbnail'] = images[0]
+            self._docs[doc_id] = stored
+
+    def remove(self, doc_id: str):
+        """Drop a document from the index"""
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+        self._docs.pop(doc_id, None)
+
+    def rebuild(self, docs: Iterable[dict]):
+        """Replace the whole index"""
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._docs.clear()
+            self._total_length = 0
+            for doc in docs:
+                self.upsert(doc)
+            self.is_built = True
+        logger.info(f"Local search index built with {len(self)} opportunities")
+
+    def ensure_built(self, loader: Callable[[], Iterable[dict]]):
+        """Build the index from loader() the first time it is needed"""
+        if self.is_built:
+            return
+        with self._lock:
+            if not self.is_built:
+                self.rebuild(loader())
+
+    def search(self, query: str, limit: int = 20, type: Optional[str] = None) -> List[dict]:
+        """
+        Rank documents matching any query token by BM25
+
+        Returns:
+            List of stored result fields plus '_score', best match first
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+
+            scores: Dict[str, float] = defaultdict(float)
+            for token in tokens:
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = 1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            results = []
+            for doc_id, score in ranked:
+                doc = self._docs[doc_id]
+                if type and doc.get('type') != type:
+                    continue
+                result = doc.copy()
+                result['_score'] = round(score, 4)
+                results.append(result)
+                if len(results) >= limit:
+                    break
+            return results
+
+# Global instance
+local_search_index = LocalSearchIndex()
@@ -0,0 +1,98 @@
+"""Background moderation - Worker pool that moderates opportunities off the request thread"""
+import concurrent.futures
+import threading
+from typing import Optional
+from utils.logging_config import logger
+
+DEFAULT_MODERATION_WORKERS = 4
+# A failed job is retried this many times, waiting RETRY_BACKOFF * 2**attempt seconds
+DEFAULT_MODERATION_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 30
+
+def _complete_moderation(opportunity_id: str, job_id: str):
+    from services.opportunity_publish_service import OpportunityPublishService
+    OpportunityPublishService.complete_moderation(opportunity_id, job_id)
+
+class ModerationQueue:
+    """
+    Runs moderation jobs on a bounded thread pool.
+
+    A job is (opportunity_id, job_id); the worker only transitions the
+    document if it still carries that job id, so a resubmission supersedes
+    any job that is still in flight. A job that raises (model or Firestore
+    outage) is retried with exponential backoff.
+    """
+
+    def __init__(self, workers: int = DEFAULT_MODERATION_WORKERS, handler=_complete_moderation,
+                 retries: int = DEFAULT_MODERATION_RETRIES, backoff: float = DEFAULT_RETRY_BACKOFF):
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self._handler = handler
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='moderation'
+                )
+            return self._executor
+
+    def submit(self, opportunity_id: str, job_id: str, attempt: int = 0) -> concurrent.futures.Future:
+        """Queue an opportunity for moderation"""
+        with self._lock:
+            self._in_flight += 1
+        return self._get_executor().submit(self._run, opportunity_id, job_id, attempt)
+
+    def _run(self, opportunity_id: str, job_id: str, attempt: int):
+        try:
+            self._handler(opportunity_id, job_id)
+        except Exception as e:
+            if attempt < self.retries:
+                delay = self.backoff * 2 ** attempt
+                logger.warning(f"Moderation job {job_id} for {opportunity_id} failed, "
+                               f"retrying in {delay:g}s: {str(e)}")
+                timer = threading.Timer(delay, self.submit, args=(opportunity_id, job_id, attempt + 1))
+                timer.daemon = True
+                timer.start()
+            else:
+                # Out of retries: the document stays pending until resume_pending runs at the next start
+                logger.error(f"Moderation job {job_id} for {opportunity_id} failed after "
+                             f"{attempt + 1} attempts, left pending: {str(e)}")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    def start(self, workers: Optional[int] = None):
+        """Size the pool and re-queue opportunities left pending by a previous process"""
+        if workers is not None:
+            self.workers = workers
+        threading.Thread(target=self.resume_pending, name='moderation-resume', daemon=True).start()
+
+    def resume_pending(self) -> int:
+        """Queue every opportunity still waiting for moderation; returns how many were queued"""
+        from config.settings import db
+        docs = db.collection('opportunities')\
+                 .where('status', '==', 'pending_moderation')\
+                 .select(['moderation_job_id'])\
+                 .stream()
+        queued = 0
+        for doc in docs:
+            job_id = (doc.to_dict() or {}).get('moderation_job_id')
+            if job_id:
+                self.submit(doc.id, job_id)
+                queued += 1
+        if queued:
+            logger.info(f"Re-queued {queued} opportunities pending moderation")
+        return queued
+
+# Global instance
+moderation_queue = ModerationQueue()
@@ -1,10 +1,77 @@
 """Content moderation service using Google Gemini AI"""
 from google import genai
-from typing import Dict, List, Tuple
-from config.settings import GEMINI_API_KEY
+from typing import Dict, List, Optional, Tuple
+from config.settings import GEMINI_API_KEY, MODERATION_LLM_MODE, MODERATION_BATCH_TOKEN_BUDGET
+from services.profanity_filter import profanity_filter
+from utils.cache import TTLCache
 from utils.logging_config import logger
 import asyncio
 import concurrent.futures
+import hashlib
+import json
+import re
+
+# Fields sent to the model; the verdict is cached under a hash of exactly these
+MODERATED_FIELDS = ('title', 'description', 'organization', 'benefits', 'eligibility', 'application_process')
+
+# Definitive verdicts by content hash: {hash: (is_approved, issues)}
+_verdict_cache = TTLCache(maxsize=4096, ttl=7 * 24 * 3600)
+
+MODERATION_PROMPT = """You are a content moderator for an educational opportunities platform. Your ONLY job is to check for profanity and vulgar language.
+
+<moderation_criteria>
+ONLY check for:
+1. Profanity or vulgar language (swear words, inappropriate language)
+</moderation_criteria>
+
+<response_format>
+If the content contains NO profanity, respond with:
+APPROVED
+
+If the content contains profanity, respond with:
+REJECTED
+1. [Specific profanity found with quote]
+
+ONLY reject for profanity. Approve everything else.
+</response_format>
+
+Examples:
+- Profanity: "Remove 'shit' from description"
+- No profanity: APPROVED (even if content seems promotional, incomplete, or unclear)
+"""
+
+BATCH_MODERATION_PROMPT = MODERATION_PROMPT + """
+<batch_format>
+You will receive several submissions, each in an <opportunity_submission item="N"> block.
+Judge each one independently and answer for every item, in order, using exactly:
+
+=== ITEM N ===
+APPROVED
+
+or
+
+=== ITEM N ===
+REJECTED
+1. [Specific profanity found with quote]
+</batch_format>
+"""
+
+# Per-item sections of a batch reply: "=== ITEM N ===" followed by its verdict
+_ITEM_RE = re.compile(r'^\s*=+\s*ITEM\s+(\d+)\s*=+\s*$(.*?)(?=^\s*=+\s*ITEM\s+\d+\s*=+\s*$|\Z)',
+                      re.MULTILINE | re.DOTALL)
+
+MAX_BATCH_ITEMS = 20
+# Rough prompt size estimate; Gemini tokens average about four characters
+CHARS_PER_TOKEN = 4
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def content_hash(opportunity_data: dict) -> str:
+    """Hash the moderated fields of an opportunity"""
+    content = {field: str(opportunity_data.get(field) or '') for field in MODERATED_FIELDS}
+    raw = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
 
 
 class ModerationService:
@@ -31,6 +98,52 @@ class ModerationService:
             logger.error(f"Gemini client error: {str(e)}")
             raise e
     
+    @staticmethod
+    def _submission_xml(opportunity_data: dict, item: Optional[int] = None) -> str:
+        """Render the moderated fields as a tagged submission block"""
+        opening = f'<opportunity_submission item="{item}">' if item is not None else '<opportunity_submission>'
+        fields = '\n'.join(
+            f"    <{field}>{opportunity_data.get(field, '')}</{field}>" for field in MODERATED_FIELDS
+        )
+        return f"\n{opening}\n{fields}\n</opportunity_submission>\n"
+    
+    @staticmethod
+    def _parse_verdict(ai_response: str) -> Optional[Tuple[bool, List[str]]]:
+        """Parse an APPROVED / REJECTED reply; None if the format is unexpected"""
+        ai_response = ai_response.strip()
+        if ai_response.startswith("APPROVED"):
+            return True, []
+        if ai_response.startswith("REJECTED"):
+            # Extract issues from numbered list
+            lines = ai_response.split('\n')[1:]  # Skip "REJECTED" line
+            issues = [line.strip() for line in lines if line.strip() and line.strip()[0].isdigit()]
+            # Remove numbering
+            issues = [issue.split('. ', 1)[1] if '. ' in issue else issue for issue in issues]
+            return False, issues
+        return None
+    
+    @staticmethod
+    def _local_verdict(opportunity_data: dict, digest: str) -> Optional[Tuple[bool, List[str]]]:
+        """Verdict reached without the model (cache or lexicon pre-filter), or None"""
+        cached = ModerationService.cached_verdict(opportunity_data, digest)
+        if cached is not None:
+            logger.info(f"Moderation verdict reused for unchanged content {digest[:12]}")
+            return cached
+        
+        # Local lexicon pass: clear profanity is rejected without a model call
+        screen = profanity_filter.screen({field: opportunity_data.get(field) for field in MODERATED_FIELDS})
+        if screen.verdict == 'reject':
+            issues = [f"Remove '{words}' from {field.replace('_', ' ')}" for field, words in screen.hits]
+            logger.info(f"Moderation rejected by lexicon pre-filter: {len(issues)} hits")
+            _verdict_cache.set(digest, (False, issues))
+            return False, issues
+        if MODERATION_LLM_MODE == 'never' or (screen.verdict == 'clean' and MODERATION_LLM_MODE != 'always'):
+            logger.info(f"Moderation approved by lexicon pre-filter ({screen.verdict})")
+            _verdict_cache.set(digest, (True, []))
+            return True, []
+        logger.info(f"Lexicon pre-filter found ambiguous content, asking the model: {'; '.join(screen.signals)}")
+        return None
+    
     @staticmethod
     def moderate_opportunity(opportunity_data: dict) -> Tuple[bool, List[str]]:
         """
@@ -42,74 +155,152 @@ class ModerationService:
         Returns:
             Tuple of (is_approved, list of issues/suggestions)
         """
+        digest = content_hash(opportunity_data)
+        local = ModerationService._local_verdict(opportunity_data, digest)
+        if local is not None:
+            return local
+        
         if not GEMINI_API_KEY:
             logger.warning("Gemini API key not configured, skipping moderation")
             return True, []
         
-        # Construct content to moderate
-        content_to_check = f"""
-<opportunity_submission>
-    <title>{opportunity_data.get('title', '')}</title>
-    <description>{opportunity_data.get('description', '')}</description>
-    <organization>{opportunity_data.get('organization', '')}</organization>
-    <benefits>{opportunity_data.get('benefits', '')}</benefits>
-    <eligibility>{opportunity_data.get('eligibility', '')}</eligibility>
-    <application_process>{opportunity_data.get('application_process', '')}</application_process>
-</opportunity_submission>
-"""
-        
-        system_prompt = """You are a content moderator for an educational opportunities platform. Your ONLY job is to check for profanity and vulgar language.
-
-<moderation_criteria>
-ONLY check for:
-1. Profanity or vulgar language (swear words, inappropriate language)
-</moderation_criteria>
-
-<response_format>
-If the content contains NO profanity, respond with:
-APPROVED
-
-If the content contains profanity, respond with:
-REJECTED
-1. [Specific profanity found with quote]
-
-ONLY reject for profanity. Approve everything else.
-</response_format>
-
-Examples:
-- Profanity: "Remove 'shit' from description"
-- No profanity: APPROVED (even if content seems promotional, incomplete, or unclear)
-"""
-        
         try:
             # Create the full prompt
-            full_prompt = f"{system_prompt}\n\nPlease review this opportunity submission:\n\n{content_to_check}"
+            content_to_check = ModerationService._submission_xml(opportunity_data)
+            full_prompt = f"{MODERATION_PROMPT}\n\nPlease review this opportunity submission:\n\n{content_to_check}"
             
             # Generate content using Gemini 2.5 Flash safely
             ai_response = ModerationService._run_gemini_safely(full_prompt)
             
             logger.info(f"Moderation response: {ai_response}")
             
-            # Parse response
-            if ai_response.startswith("APPROVED"):
-                return True, []
-            elif ai_response.startswith("REJECTED"):
-                # Extract issues from numbered list
-                lines = ai_response.split('\n')[1:]  # Skip "REJECTED" line
-                issues = [line.strip() for line in lines if line.strip() and line.strip()[0].isdigit()]
-                # Remove numbering
-                issues = [issue.split('. ', 1)[1] if '. ' in issue else issue for issue in issues]
-                return False, issues
-            else:
+            verdict = ModerationService._parse_verdict(ai_response)
+            if verdict is None:
                 # Unexpected response format, approve by default
                 logger.warning(f"Unexpected moderation response format: {ai_response}")
                 return True, []
+            _verdict_cache.set(digest, verdict)
+            return verdict[0], list(verdict[1])
                 
         except Exception as e:
             logger.error(f"Gemini moderation service error: {str(e)}")
             # On error, approve by default to not block legitimate submissions
             return True, []
     
+    @staticmethod
+    def moderate_many(opportunities: List[dict],
+                      token_budget: int = MODERATION_BATCH_TOKEN_BUDGET) -> List[Tuple[bool, List[str]]]:
+        """
+        Moderate several opportunities, packing those that need the model into shared prompts
+        
+        Each batch holds at most MAX_BATCH_ITEMS submissions and roughly
+        token_budget prompt tokens. Items missing from a batch reply, or whose
+        verdict cannot be parsed, are retried one at a time.
+        
+        Returns:
+            List of (is_approved, issues) aligned with the input
+        """
+        results: List[Optional[Tuple[bool, List[str]]]] = [None] * len(opportunities)
+        pending = []
+        for index, opportunity_data in enumerate(opportunities):
+            digest = content_hash(opportunity_data)
+            local = ModerationService._local_verdict(opportunity_data, digest)
+            if local is not None:
+                results[index] = local
+            else:
+                tokens = _estimate_tokens(ModerationService._submission_xml(opportunity_data, MAX_BATCH_ITEMS))
+                pending.append((index, digest, tokens))
+        
+        if pending and not GEMINI_API_KEY:
+            logger.warning("Gemini API key not configured, skipping moderation")
+            pending = []
+        
+        # Pack submissions greedily under the token budget
+        batches, batch, batch_tokens = [], [], _estimate_tokens(BATCH_MODERATION_PROMPT)
+        for entry in pending:
+            entry_tokens = entry[2]
+            if batch and (len(batch) >= MAX_BATCH_ITEMS or batch_tokens + entry_tokens > token_budget):
+                batches.append(batch)
+                batch, batch_tokens = [], _estimate_tokens(BATCH_MODERATION_PROMPT)
+            batch.append(entry)
+            batch_tokens += entry_tokens
+        if batch:
+            batches.append(batch)
+        
+        retry = []
+        for batch in batches:
+            verdicts = {}
+            if len(batch) > 1:
+                verdicts = ModerationService._moderate_batch([opportunities[index] for index, _, _ in batch])
+            for item, (index, digest, _) in enumerate(batch, 1):
+                verdict = verdicts.get(item)
+                if verdict is None:
+                    retry.append(index)
+                    continue
+                _verdict_cache.set(digest, verdict)
+                results[index] = (verdict[0], list(verdict[1]))
+        
+        if retry:
+            logger.info(f"Moderating {len(retry)} submissions individually")
+        for index in retry:
+            results[index] = ModerationService.moderate_opportunity(opportunities[index])
+        
+        # Anything left was skipped because moderation is not configured
+        return [result if result is not None else (True, []) for result in results]
+    
+    @staticmethod
+    def _moderate_batch(batch: List[dict]) -> Dict[int, Tuple[bool, List[str]]]:
+        """Send one packed prompt; returns parsed verdicts keyed by 1-based item number"""
+        submissions = ''.join(
+            ModerationService._submission_xml(opportunity_data, item)
+            for item, opportunity_data in enumerate(batch, 1)
+        )
+        full_prompt = f"{BATCH_MODERATION_PROMPT}\n\nPlease review these {len(batch)} opportunity submissions:\n{submissions}"
+        try:
+            ai_response = ModerationService._run_gemini_safely(full_prompt)
+        except Exception as e:
+            logger.error(f"Gemini batch moderation error: {str(e)}")
+            return {}
+        
+        verdicts = {}
+        for match in _ITEM_RE.finditer(ai_response):
+            item = int(match.group(1))
+            if 1 <= item <= len(batch) and item not in verdicts:
+                verdict = ModerationService._parse_verdict(match.group(2))
+                if verdict is not None:
+                    verdicts[item] = verdict
+        logger.info(f"Batch moderation parsed {len(verdicts)} of {len(batch)} verdicts")
+        return verdicts
+    
+    @staticmethod
+    def cached_verdict(opportunity_data: dict, digest: Optional[str] = None) -> Optional[Tuple[bool, List[str]]]:
+        """
+        Return a previous definitive verdict for identical content, if any
+        
+        Checks the verdict persisted on the document first, then the in-process cache.
+        """
+        digest = digest or content_hash(opportunity_data)
+        if opportunity_data.get('moderation_hash') == digest and 'moderation_approved' in opportunity_data:
+            approved = bool(opportunity_data['moderation_approved'])
+            return approved, [] if approved else list(opportunity_data.get('moderation_issues') or [])
+        cached = _verdict_cache.get(digest)
+        if cached is not None:
+            return cached[0], list(cached[1])
+        return None
+    
+    @staticmethod
+    def verdict_fields(opportunity_data: dict) -> Dict:
+        """
+        Fields that persist the verdict for this content on the opportunity document
+        
+        Empty when the last verdict was not definitive (model error, unparseable
+        response or moderation disabled), so that content is moderated again.
+        """
+        verdict = ModerationService.cached_verdict(opportunity_data)
+        if verdict is None:
+            return {}
+        return {'moderation_hash': content_hash(opportunity_data), 'moderation_approved': verdict[0]}
+    
     @staticmethod
     def get_moderation_summary(issues: List[str]) -> str:
         """Generate a user-friendly summary of moderation issues"""
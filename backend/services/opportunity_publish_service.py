@@ -1,7 +1,16 @@
 """Additional opportunity service methods for publishing/unpublishing"""
+import uuid
 from firebase_admin import firestore
 from config.settings import db
-from services.moderation_service import ModerationService
+from services.moderation_service import ModerationService, content_hash
+from services.opportunity_service import (
+    OpportunityService, opportunity_cache, index_opportunity, unindex_opportunity
+)
+from models.opportunity import parse_deadline
+from services.facet_service import FacetService
+from services.draft_autosave_service import draft_autosave
+from services.moderation_queue import moderation_queue
+from services.algolia_outbox import enqueue_index_op, algolia_indexer
 from utils.logging_config import logger
 try:
     from services.algolia_service import algolia_service
@@ -14,9 +23,29 @@ except (ValueError, ImportError) as e:
 class OpportunityPublishService:
     """Service for publishing and unpublishing opportunities"""
     
+    @staticmethod
+    def request_moderation(opportunity_id, data=None):
+        """
+        Mark an opportunity as pending moderation and queue it for the worker pool
+        
+        Args:
+            data: Field changes to save along with the pending status
+            
+        Returns:
+            The moderation job id
+        """
+        job_id = uuid.uuid4().hex
+        changes = {**(data or {}), 'status': 'pending_moderation', 'moderation_job_id': job_id}
+        OpportunityService.update_opportunity(opportunity_id, changes)
+        moderation_queue.submit(opportunity_id, job_id)
+        logger.info(f"Opportunity {opportunity_id} queued for moderation (job {job_id})")
+        return job_id
+    
     @staticmethod
     def publish_opportunity(opportunity_id):
-        """Publish a draft opportunity with AI moderation"""
+        """Submit a draft opportunity for publishing; moderation completes in the background"""
+        # Publish what the editor last autosaved
+        draft_autosave.flush(opportunity_id)
         doc_ref = db.collection('opportunities').document(opportunity_id)
         doc = doc_ref.get()
         
@@ -27,49 +56,88 @@ class OpportunityPublishService:
         if data.get('status') == 'published':
             return False, "Opportunity is already published"
         
-        # Moderate content with AI before publishing
-        logger.info(f"Moderating opportunity {opportunity_id} before publishing")
+        job_id = OpportunityPublishService.request_moderation(opportunity_id)
+        return True, {"status": "pending_moderation", "moderation_job_id": job_id}
+    
+    @staticmethod
+    def complete_moderation(opportunity_id, job_id):
+        """
+        Moderate a pending opportunity and publish or reject it
+        
+        Runs on the moderation worker pool. The verdict is only applied if the
+        document is still pending under the same job, so edits or resubmissions
+        made while the model was running are never overwritten.
+        """
+        doc_ref = db.collection('opportunities').document(opportunity_id)
+        doc = doc_ref.get()
+        data = doc.to_dict() if doc.exists else None
+        if not data or data.get('status') != 'pending_moderation' or data.get('moderation_job_id') != job_id:
+            logger.info(f"Skipping stale moderation job {job_id} for {opportunity_id}")
+            return None
+        
+        logger.info(f"Moderating opportunity {opportunity_id} (job {job_id})")
         is_approved, issues = ModerationService.moderate_opportunity(data)
         
-        if not is_approved:
-            # Update as rejected with moderation notes
-            data['status'] = 'rejected'
-            data['moderation_notes'] = ModerationService.get_moderation_summary(issues)
-            doc_ref.update(data)
-            
-            logger.info(f"Opportunity {opportunity_id} rejected by moderation during publish")
-            
-            return False, {
-                "status": "rejected",
-                "message": "Your opportunity needs revision",
-                "issues": issues,
-                "moderation_notes": data['moderation_notes']
+        if is_approved:
+            changes = {
+                'status': 'published',
+                'moderation_notes': '',  # Clear any previous moderation notes
+                'moderation_issues': [],
+                'deadline_at': parse_deadline(data.get('deadline'), data.get('has_indefinite_deadline', False))
+            }
+        else:
+            changes = {
+                'status': 'rejected',
+                'moderation_notes': ModerationService.get_moderation_summary(issues),
+                'moderation_issues': issues
             }
+        # Persist the verdict so unchanged content is not sent to the model again
+        changes.update(ModerationService.verdict_fields(data))
+        moderated_hash = content_hash(data)
         
-        # Content approved, publish the opportunity
-        data['status'] = 'published'
-        data['moderation_notes'] = ''  # Clear any previous moderation notes
-        doc_ref.update(data)
+        @firestore.transactional
+        def _apply(transaction):
+            snapshot = doc_ref.get(transaction=transaction)
+            latest = snapshot.to_dict() if snapshot.exists else None
+            if not latest or latest.get('status') != 'pending_moderation' or latest.get('moderation_job_id') != job_id:
+                return False
+            if content_hash(latest) != moderated_hash:
+                # Edited while pending: moderate the new content under the same job
+                return None
+            transaction.update(doc_ref, {
+                **changes,
+                'moderatedAt': firestore.SERVER_TIMESTAMP,
+                'updatedAt': firestore.SERVER_TIMESTAMP
+            })
+            if is_approved:
+                enqueue_index_op(transaction, opportunity_id, 'upsert')
+            return True
         
-        # Add to Algolia
+        applied = _apply(db.transaction())
+        if applied is None:
+            logger.info(f"Opportunity {opportunity_id} content changed during moderation, re-moderating")
+            return OpportunityPublishService.complete_moderation(opportunity_id, job_id)
+        if not applied:
+            logger.info(f"Opportunity {opportunity_id} changed during moderation job {job_id}, verdict discarded")
+            return None
+        opportunity_cache.invalidate(opportunity_id)
+        data.update(changes)
+        
+        if not is_approved:
+            logger.info(f"Opportunity {opportunity_id} rejected by moderation")
+            return False
+        
+        index_opportunity({**data, 'id': opportunity_id})
+        FacetService.record_change(None, data)
+        
+        # The Algolia outbox entry was committed with the verdict
         if ALGOLIA_AVAILABLE:
-            try:
-                algolia_data = data.copy()
-                algolia_data['objectID'] = opportunity_id
-                algolia_data['id'] = opportunity_id  # Ensure id field matches Firestore document ID
-                algolia_data['status'] = 'published'
-                success = algolia_service.save_objects([algolia_data])
-                if success:
-                    logger.info(f"Successfully synced opportunity {opportunity_id} to Algolia")
-                else:
-                    logger.warning(f"Failed to sync opportunity {opportunity_id} to Algolia")
-            except Exception as e:
-                logger.error(f"Error syncing opportunity {opportunity_id} to Algolia: {str(e)}")
+            algolia_indexer.notify()
         else:
             logger.warning("Algolia service not available - opportunity published but not synced to search")
         
         logger.info(f"Opportunity {opportunity_id} published successfully after moderation")
-        return True, "Opportunity published successfully"
+        return True
     
     @staticmethod
     def unpublish_opportunity(opportunity_id):
@@ -84,19 +152,17 @@ class OpportunityPublishService:
         if data.get('status') == 'draft':
             return False, "Opportunity is already a draft"
         
-        # Update status to draft
-        doc_ref.update({'status': 'draft'})
+        # Update status to draft and queue the Algolia removal in the same commit
+        batch = db.batch()
+        batch.update(doc_ref, {'status': 'draft', 'updatedAt': firestore.SERVER_TIMESTAMP})
+        queued = enqueue_index_op(batch, opportunity_id, 'delete')
+        batch.commit()
+        opportunity_cache.invalidate(opportunity_id)
+        unindex_opportunity(opportunity_id)
+        FacetService.record_change(data, None)
         
-        # Remove from Algolia
-        if ALGOLIA_AVAILABLE:
-            try:
-                success = algolia_service.delete_objects([opportunity_id])
-                if success:
-                    logger.info(f"Successfully removed opportunity {opportunity_id} from Algolia")
-                else:
-                    logger.warning(f"Failed to remove opportunity {opportunity_id} from Algolia")
-            except Exception as e:
-                logger.error(f"Error removing opportunity {opportunity_id} from Algolia: {str(e)}")
+        if queued:
+            algolia_indexer.notify()
         else:
             logger.warning("Algolia service not available - opportunity unpublished but not removed from search")
         
@@ -0,0 +1,190 @@
+"""In-memory replica of published opportunities kept current by a Firestore snapshot listener"""
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from utils.logging_config import logger
+
+# Seconds between listener health checks, and the cap for the retry backoff
+DEFAULT_CHECK_INTERVAL = 30
+MAX_RESUBSCRIBE_DELAY = 300
+
+def _published_opportunities_query():
+    """Default snapshot source: the published opportunities query"""
+    from config.settings import db
+    return db.collection('opportunities').where('status', '==', 'published')
+
+class OpportunityReplica:
+    """
+    Keeps a dict of published opportunity documents in process.
+
+    The source is anything with an `on_snapshot(callback)` method returning a
+    watch handle with `unsubscribe()` - a Firestore query in production, or a
+    local fake in tests. The callback receives (docs, changes, read_time) where
+    each change has `type.name` in ADDED/MODIFIED/REMOVED and a `document`.
+
+    A background supervisor resubscribes when the listener dies (the watch
+    handle reports `is_active` False) or a snapshot cannot be applied. Until
+    the new listener delivers its initial snapshot the replica is not ready,
+    so readers fall back to Firestore.
+    """
+
+    def __init__(self, source_factory: Callable[[], Any] = _published_opportunities_query,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self._source_factory = source_factory
+        self.check_interval = check_interval
+        self._docs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._watch = None
+        self._generation = 0
+        # Set when a snapshot could not be applied; wakes the supervisor
+        self._broken = threading.Event()
+        self._stop = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+        # Bumped on every applied change; together with the per-process epoch
+        # this is a cheap collection version for ETags
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.last_modified: Optional[datetime] = None
+
+    @property
+    def is_ready(self) -> bool:
+        """True once the initial snapshot has been loaded"""
+        return self._ready.is_set()
+
+    def start(self):
+        """Attach the snapshot listener and its supervisor (no-op if already running)"""
+        if self._supervisor is not None:
+            return
+        self._stop = threading.Event()
+        self._attach()
+        self._supervisor = threading.Thread(
+            target=self._supervise, args=(self._stop,), name='opportunity-replica', daemon=True
+        )
+        self._supervisor.start()
+
+    def _attach(self) -> bool:
+        self._generation += 1
+        generation = self._generation
+
+        def _callback(docs, changes, read_time):
+            # Ignore late callbacks from a listener that has been replaced
+            if generation == self._generation:
+                self._on_snapshot(docs, changes, read_time)
+
+        try:
+            self._broken.clear()
+            self._watch = self._source_factory().on_snapshot(_callback)
+            logger.info("Opportunity replica listener attached")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start opportunity replica: {str(e)}")
+            self._watch = None
+            return False
+
+    def _detach(self):
+        self._generation += 1
+        if self._watch is not None:
+            try:
+                self._watch.unsubscribe()
+            except Exception as e:
+                logger.warning(f"Error stopping opportunity replica: {str(e)}")
+            self._watch = None
+        with self._lock:
+            self._docs.clear()
+            self.version += 1
+            self.last_modified = None
+        self._ready.clear()
+
+    def _listener_failed(self) -> bool:
+        return self._watch is None or self._broken.is_set() or not getattr(self._watch, 'is_active', True)
+
+    def check_listener(self) -> bool:
+        """
+        Resubscribe if the listener has died
+
+        Returns:
+            False if a resubscribe was needed and failed
+        """
+        if not self._listener_failed():
+            return True
+        logger.warning("Opportunity replica listener lost, resubscribing")
+        self._detach()
+        return self._attach()
+
+    def _supervise(self, stop: threading.Event):
+        delay = self.check_interval
+        healthy = True
+        while not stop.is_set():
+            if healthy:
+                self._broken.wait(self.check_interval)
+            else:
+                stop.wait(delay)
+            if stop.is_set():
+                break
+            try:
+                healthy = self.check_listener()
+            except Exception as e:
+                logger.error(f"Opportunity replica supervisor error: {str(e)}")
+                healthy = False
+            delay = self.check_interval if healthy else min(delay * 2, MAX_RESUBSCRIBE_DELAY)
+
+    def stop(self):
+        """Detach the listener and drop the replica"""
+        self._stop.set()
+        self._broken.set()  # Wake the supervisor so it exits
+        self._supervisor = None
+        self._detach()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the initial snapshot has arrived"""
+        return self._ready.wait(timeout)
+
+    def _on_snapshot(self, docs, changes, read_time):
+        """Apply incremental changes from the listener thread"""
+        try:
+            with self._lock:
+                for change in changes:
+                    doc = change.document
+                    if change.type.name == 'REMOVED':
+                        self._docs.pop(doc.id, None)
+                    else:
+                        data = doc.to_dict() or {}
+                        data['id'] = doc.id
+                        self._docs[doc.id] = data
+                if changes or not self._ready.is_set():
+                    self.version += 1
+                    self.last_modified = datetime.now(timezone.utc)
+            if not self._ready.is_set():
+                logger.info(f"Opportunity replica ready with {len(self._docs)} documents")
+            self._ready.set()
+        except Exception as e:
+            # The replica may now be missing changes: serve from Firestore until resubscribed
+            logger.error(f"Error applying opportunity snapshot: {str(e)}")
+            self._ready.clear()
+            self._broken.set()
+
+    def collection_version(self) -> Optional[str]:
+        """Return an opaque version of the replicated collection, or None until ready"""
+        if not self.is_ready:
+            return None
+        return f"{self.epoch}-{self.version}"
+
+    def get(self, opportunity_id: str) -> Optional[dict]:
+        """Return a copy of a published opportunity, or None if not replicated"""
+        with self._lock:
+            data = self._docs.get(opportunity_id)
+            return data.copy() if data is not None else None
+
+    def all(self) -> List[dict]:
+        """Return copies of all replicated opportunities"""
+        with self._lock:
+            return [data.copy() for data in self._docs.values()]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._docs)
+
+# Global instance
+opportunity_replica = OpportunityReplica()
@@ -1,8 +1,20 @@
 """Opportunity service - Business logic for opportunities"""
 from firebase_admin import firestore
-from config.settings import db
-from datetime import datetime
+from config.settings import db, OPPORTUNITY_CACHE_SIZE, OPPORTUNITY_CACHE_TTL
+from datetime import datetime, timedelta, timezone
+from models.opportunity import CARD_FIELDS, parse_deadline, resolve_list_window
+from services.opportunity_replica import opportunity_replica
+from services.local_search_service import local_search_index
+from services.related_service import related_index, DEFAULT_TOP_K
+from services.facet_service import FacetService
+from services.engagement_service import EngagementService
+from services.draft_autosave_service import draft_autosave
+from services.algolia_outbox import enqueue_index_op, algolia_indexer
+from utils.cache import TTLCache
+from utils.pagination import encode_cursor, decode_cursor
 from utils.logging_config import logger
+import hashlib
+import unicodedata
 try:
     from services.algolia_service import algolia_service
     ALGOLIA_AVAILABLE = True
@@ -11,13 +23,290 @@ except (ValueError, ImportError) as e:
     ALGOLIA_AVAILABLE = False
     algolia_service = None
 
+# Read-through cache for single-opportunity lookups, invalidated on every write
+opportunity_cache = TTLCache(maxsize=OPPORTUNITY_CACHE_SIZE, ttl=OPPORTUNITY_CACHE_TTL)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# List orderings (models.opportunity.LIST_ORDER_BY): order_by value -> (field, direction). Every combination
+# of these with the type/organization/tags filters has a composite index in
+# firestore.indexes.json.
+LIST_ORDERINGS = {
+    'deadline': ('deadline_at', firestore.Query.ASCENDING),
+    'createdAt': ('createdAt', firestore.Query.DESCENDING),
+}
+MAX_TAG_FILTERS = 10
+MAX_CLOSING_SOON_DAYS = 90
+# Firestore get_all accepts many references, but keep each RPC bounded
+BATCH_GET_CHUNK_SIZE = 100
+MAX_BATCH_IDS = 500
+EXPORT_PAGE_SIZE = 500
+
+def index_opportunity(data):
+    """Update the in-process search and related indexes for a published opportunity"""
+    local_search_index.upsert(data)
+    related_index.upsert(data)
+
+def unindex_opportunity(opportunity_id):
+    """Drop an opportunity that is no longer published from the in-process indexes"""
+    local_search_index.remove(opportunity_id)
+    related_index.remove(opportunity_id)
+
+def apply_deadline_at(data, current=None):
+    """
+    Set the normalized deadline_at timestamp when a write touches the deadline
+    
+    Args:
+        current: The stored document for partial writes; deadline fields the
+                 write leaves out are taken from it
+    """
+    if 'deadline' in data or 'has_indefinite_deadline' in data:
+        merged = {**(current or {}), **data}
+        data['deadline_at'] = parse_deadline(merged.get('deadline'), merged.get('has_indefinite_deadline', False))
+    return data
+
+# Title-derived draft ids probe this many suffixed ids when the base id is
+# already taken by a document that is no longer a draft
+MAX_DRAFT_ID_PROBES = 20
+
+def normalize_title(title):
+    """Normalize a title for draft identity: NFKC, casefolded, single spaces"""
+    return ' '.join(unicodedata.normalize('NFKC', str(title or '')).casefold().split())
+
+def draft_document_id(user_id, title=None, client_draft_id=None):
+    """
+    Derive the deterministic document id of a user's draft
+
+    A client-supplied draft id takes precedence over the title, so a draft
+    keeps its identity while its title is being edited.
+
+    Returns:
+        Document id, or None if neither a draft id nor a title is available
+    """
+    if client_draft_id:
+        if not isinstance(client_draft_id, str) or len(client_draft_id) > 128:
+            raise ValueError("draft_id must be a string of at most 128 characters")
+        key = f"client\x00{user_id}\x00{client_draft_id}"
+    else:
+        title = normalize_title(title)
+        if not title:
+            return None
+        key = f"title\x00{user_id}\x00{title}"
+    return 'draft-' + hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+# Fields left out of (or derived away from) the Algolia record; changing only
+# these does not require a re-push. 'images' only matters through its first entry.
+ALGOLIA_IGNORED_FIELDS = frozenset({'application_form', 'additional_info', 'createdAt', 'updatedAt'})
+
+# Last successful Algolia sync; incremental runs only re-read documents updated after it
+ALGOLIA_SYNC_DOC_PATH = ('stats', 'algolia_sync')
+# Writes are re-read this far behind the watermark: server timestamps of commits
+# racing the previous run, and clock skew against it, stay covered
+SYNC_WATERMARK_OVERLAP = timedelta(minutes=1)
+
+_MISSING = object()
+
+def diff_fields(current, data):
+    """Return the subset of data whose values differ from the current document"""
+    return {key: value for key, value in data.items() if current.get(key, _MISSING) != value}
+
+def algolia_fields_changed(current, changes):
+    """Whether applying changes to current alters the record pushed to Algolia"""
+    for key, value in changes.items():
+        if key in ALGOLIA_IGNORED_FIELDS:
+            continue
+        if key == 'images':
+            old_images = current.get('images') or [None]
+            new_images = value or [None]
+            if old_images[0] == new_images[0]:
+                continue
+        return True
+    return False
+
 class OpportunityService:
     """Service for managing opportunities"""
     
     @staticmethod
-    def get_all_opportunities():
-        """Get all opportunities from Firestore"""
+    def list_opportunities(limit=DEFAULT_PAGE_SIZE, cursor=None, type=None, tags=None,
+                           organization=None, deadline_from=None, deadline_to=None, order_by=None):
+        """
+        Get one page of published opportunities with card fields only
+        
+        Filters are translated into native Firestore predicates. A deadline window
+        is a range filter on the typed deadline_at field, so it forces ordering by
+        deadline and leaves out opportunities without a dated deadline. Ordering
+        by deadline without a window lists open opportunities only (deadline_at
+        from now on); indefinite and expired ones are left out.
+        
+        Args:
+            limit: Page size, clamped to MAX_PAGE_SIZE
+            cursor: Opaque cursor returned as next_cursor by the previous page
+            type: Opportunity type to match exactly
+            tags: List of tags; matches opportunities having any of them
+            organization: Organization name to match exactly
+            deadline_from: Inclusive lower bound (ISO date or datetime; dates start at 00:00 WIB)
+            deadline_to: Inclusive upper bound (ISO date or datetime; dates end at 23:59:59 WIB)
+            order_by: 'deadline' (soonest first) or 'createdAt' (newest first);
+                      defaults to document order
+            
+        Returns:
+            Tuple of (opportunities, next_cursor); next_cursor is None on the last page
+            
+        Raises:
+            ValueError: On invalid arguments or cursor
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        
+        if tags and len(tags) > MAX_TAG_FILTERS:
+            raise ValueError(f"At most {MAX_TAG_FILTERS} tags can be filtered at once")
+        order_by, window_from, window_to = resolve_list_window(order_by, deadline_from, deadline_to)
+        
+        query = db.collection('opportunities').where('status', '==', 'published')
+        
+        if type:
+            query = query.where('type', '==', type)
+        if organization:
+            query = query.where('organization', '==', organization)
+        if tags:
+            if len(tags) == 1:
+                query = query.where('tags', 'array_contains', tags[0])
+            else:
+                query = query.where('tags', 'array_contains_any', list(tags))
+        if window_from:
+            query = query.where('deadline_at', '>=', window_from)
+        if window_to:
+            query = query.where('deadline_at', '<=', window_to)
+        
+        query = query.select(CARD_FIELDS)
+        order_field = None
+        if order_by:
+            order_field, direction = LIST_ORDERINGS[order_by]
+            query = query.order_by(order_field, direction=direction)\
+                         .order_by(firestore.FieldPath.document_id(), direction=direction)
+        else:
+            query = query.order_by(firestore.FieldPath.document_id())
+        
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != (2 if order_by else 1):
+                raise ValueError(f"Cursor does not match order_by: {order_by}")
+            start = {firestore.FieldPath.document_id(): values[-1]}
+            if order_by:
+                start[order_field] = values[0]
+            query = query.start_after(start)
+        
+        opportunities = []
+        for doc in query.limit(limit).stream():
+            data = doc.to_dict()
+            data['id'] = doc.id
+            opportunities.append(data)
+        
+        next_cursor = None
+        if len(opportunities) == limit:
+            last = opportunities[-1]
+            values = [last.get(order_field), last['id']] if order_by else [last['id']]
+            next_cursor = encode_cursor(values)
+        
+        return opportunities, next_cursor
+    
+    @staticmethod
+    def get_closing_soon(days=7, limit=DEFAULT_PAGE_SIZE):
+        """
+        Get published opportunities whose deadline falls within the next `days` days
+        
+        Uses a range query on deadline_at, so expired and indefinite opportunities
+        are never read and results are ordered soonest first.
+        """
+        days = int(days)
+        if days < 1 or days > MAX_CLOSING_SOON_DAYS:
+            raise ValueError(f"days must be between 1 and {MAX_CLOSING_SOON_DAYS}")
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        
+        now = datetime.now(timezone.utc)
+        docs = db.collection('opportunities')\
+                 .where('status', '==', 'published')\
+                 .where('deadline_at', '>=', now)\
+                 .where('deadline_at', '<=', now + timedelta(days=days))\
+                 .order_by('deadline_at')\
+                 .select(CARD_FIELDS)\
+                 .limit(limit)\
+                 .stream()
+        
+        opportunities = []
+        for doc in docs:
+            data = doc.to_dict()
+            data['id'] = doc.id
+            opportunities.append(data)
+        
+        return opportunities
+    
+    @staticmethod
+    def iter_opportunities(status='published', updated_since=None, created_by_uid=None):
+        """
+        Yield opportunities one at a time for bulk export
+        
+        Reads EXPORT_PAGE_SIZE documents per query and resumes with start_after,
+        so memory stays constant and no single stream runs for too long.
+        
+        Args:
+            status: Status to export, or None for every status
+            updated_since: Only yield documents with updatedAt >= this datetime
+            created_by_uid: Restrict to one creator's opportunities
+        """
+        query = db.collection('opportunities')
+        if status:
+            query = query.where('status', '==', status)
+        if created_by_uid:
+            query = query.where('created_by_uid', '==', created_by_uid)
+        if updated_since:
+            query = query.where('updatedAt', '>=', updated_since).order_by('updatedAt')
+        query = query.order_by(firestore.FieldPath.document_id())
+        
+        last_doc = None
+        while True:
+            page = query.limit(EXPORT_PAGE_SIZE)
+            if last_doc is not None:
+                page = page.start_after(last_doc)
+            
+            count = 0
+            for doc in page.stream():
+                count += 1
+                last_doc = doc
+                data = doc.to_dict()
+                data['id'] = doc.id
+                yield data
+            
+            if count < EXPORT_PAGE_SIZE:
+                return
+    
+    @staticmethod
+    def get_collection_version():
+        """
+        Get a cheap version of the published opportunity collection
+        
+        Returns:
+            Tuple of (version, last_modified); both None while the replica is warming up
+        """
+        version = opportunity_replica.collection_version()
+        if version is None:
+            return None, None
+        return version, opportunity_replica.last_modified
+    
+    @staticmethod
+    def get_all_opportunities(status=None):
+        """
+        Get all opportunities, optionally filtered by status
+        
+        Published opportunities are served from the in-memory replica once it
+        is ready; until then (or for other statuses) Firestore is read directly.
+        """
+        if status == 'published' and opportunity_replica.is_ready:
+            return opportunity_replica.all()
+        
         opportunities_ref = db.collection('opportunities')
+        if status:
+            opportunities_ref = opportunities_ref.where('status', '==', status)
         docs = opportunities_ref.stream()
         
         opportunities = []
@@ -30,60 +319,171 @@ class OpportunityService:
     
     @staticmethod
     def get_opportunity_by_id(opportunity_id):
-        """Get a single opportunity by ID"""
+        """Get a single opportunity by ID (served from the replica or opportunity_cache when possible)"""
+        if not opportunity_id:
+            return None
+        
+        if opportunity_replica.is_ready:
+            replicated = opportunity_replica.get(opportunity_id)
+            if replicated is not None:
+                return replicated
+        
+        cached = opportunity_cache.get(opportunity_id)
+        if cached is not None:
+            return cached.copy()
+        
         doc_ref = db.collection('opportunities').document(opportunity_id)
         doc = doc_ref.get()
         
         if doc.exists:
             data = doc.to_dict()
             data['id'] = doc.id
-            return data
+            opportunity_cache.set(opportunity_id, data)
+            return data.copy()
         return None
     
     @staticmethod
-    def find_draft_by_title(user_id, title):
-        """Find existing draft by user ID and title"""
-        if not title or not title.strip():
-            return None
+    def get_opportunities_by_ids(opportunity_ids):
+        """
+        Get many opportunities at once, preserving request order
+        
+        Replica and cache hits cost nothing; the rest are fetched with
+        db.get_all in chunks of BATCH_GET_CHUNK_SIZE.
+        
+        Args:
+            opportunity_ids: List of opportunity IDs (duplicates allowed)
             
-        opportunities_ref = db.collection('opportunities')
-        docs = opportunities_ref.where('created_by_uid', '==', user_id)\
-                               .where('status', '==', 'draft')\
-                               .where('title', '==', title.strip())\
-                               .limit(1)\
-                               .stream()
+        Returns:
+            List aligned with opportunity_ids containing the data, or None for misses
+        """
+        found = {}
+        to_fetch = []
+        for opportunity_id in dict.fromkeys(opportunity_ids):
+            if not opportunity_id or not isinstance(opportunity_id, str):
+                continue
+            data = opportunity_replica.get(opportunity_id) if opportunity_replica.is_ready else None
+            if data is None:
+                cached = opportunity_cache.get(opportunity_id)
+                data = cached.copy() if cached is not None else None
+            if data is not None:
+                found[opportunity_id] = data
+            else:
+                to_fetch.append(opportunity_id)
         
-        for doc in docs:
-            data = doc.to_dict()
-            data['id'] = doc.id
-            return data
+        collection = db.collection('opportunities')
+        for start in range(0, len(to_fetch), BATCH_GET_CHUNK_SIZE):
+            refs = [collection.document(opportunity_id) for opportunity_id in to_fetch[start:start + BATCH_GET_CHUNK_SIZE]]
+            for doc in db.get_all(refs):
+                if doc.exists:
+                    data = doc.to_dict()
+                    data['id'] = doc.id
+                    opportunity_cache.set(doc.id, data)
+                    found[doc.id] = data.copy()
+        
+        results = []
+        for opportunity_id in opportunity_ids:
+            data = found.get(opportunity_id) if isinstance(opportunity_id, str) else None
+            results.append(data.copy() if data is not None else None)
+        return results
+    
+    @staticmethod
+    def get_published_state(opportunity_id):
+        """
+        Get the current data of an opportunity if it is published, else None
         
+        Served from the replica when it is ready (which holds exactly the
+        published set), otherwise read from Firestore.
+        """
+        if opportunity_replica.is_ready:
+            return opportunity_replica.get(opportunity_id)
+        
+        doc = db.collection('opportunities').document(opportunity_id).get()
+        if doc.exists:
+            data = doc.to_dict()
+            if data.get('status') == 'published':
+                data['id'] = doc.id
+                return data
         return None
     
+    @staticmethod
+    def save_draft(user_id, data, client_draft_id=None):
+        """
+        Create or update a user's draft in a single transaction
+
+        The document id is derived from (user, draft id or normalized title), so
+        repeated autosaves always land on the same document without a query.
+
+        Returns:
+            Tuple of (document id, True if the draft was created)
+        """
+        data['status'] = 'draft'
+        apply_deadline_at(data)
+        base_id = draft_document_id(user_id, data.get('title'), client_draft_id)
+        if base_id is None:
+            # Nothing to key the draft on yet
+            doc_id, _ = OpportunityService.create_opportunity(data)
+            return doc_id, True
+
+        # Buffered autosave deltas for any document this save can land on are
+        # older than it; write them first so they cannot overwrite it later
+        for attempt in range(MAX_DRAFT_ID_PROBES):
+            draft_autosave.flush(base_id if attempt == 0 else f"{base_id}-{attempt}")
+
+        opportunities_ref = db.collection('opportunities')
+
+        @firestore.transactional
+        def _upsert(transaction):
+            for attempt in range(MAX_DRAFT_ID_PROBES):
+                doc_id = base_id if attempt == 0 else f"{base_id}-{attempt}"
+                doc_ref = opportunities_ref.document(doc_id)
+                snapshot = doc_ref.get(transaction=transaction)
+                if not snapshot.exists:
+                    transaction.set(doc_ref, {
+                        **data,
+                        'createdAt': firestore.SERVER_TIMESTAMP,
+                        'updatedAt': firestore.SERVER_TIMESTAMP
+                    })
+                    return doc_id, True
+                existing = snapshot.to_dict()
+                if existing.get('status') == 'draft' and existing.get('created_by_uid') == user_id:
+                    update = apply_deadline_at(dict(data), existing)
+                    transaction.update(doc_ref, {**update, 'updatedAt': firestore.SERVER_TIMESTAMP})
+                    return doc_id, False
+                # The id belongs to a submitted opportunity; keep its content intact
+            raise ValueError("Too many submitted opportunities share this draft identity")
+
+        doc_id, created = _upsert(db.transaction())
+        opportunity_cache.invalidate(doc_id)
+        return doc_id, created
+    
     @staticmethod
     def create_opportunity(data):
         """Create a new opportunity"""
+        apply_deadline_at(data)
+        
         # Add to Firestore
         doc_ref = db.collection('opportunities').document()
         firestore_data = data.copy()
         firestore_data['createdAt'] = firestore.SERVER_TIMESTAMP
-        doc_ref.set(firestore_data)
-        
-        # Only add to Algolia if published
-        if data.get('status') == 'published' and ALGOLIA_AVAILABLE:
-            try:
-                algolia_data = data.copy()
-                algolia_data['objectID'] = doc_ref.id
-                algolia_data['id'] = doc_ref.id  # Ensure id field matches Firestore document ID
-                algolia_data['createdAt'] = datetime.now().isoformat()
-                success = algolia_service.save_objects([algolia_data])
-                if success:
-                    logger.info(f"Successfully synced opportunity {doc_ref.id} to Algolia")
-                else:
-                    logger.warning(f"Failed to sync opportunity {doc_ref.id} to Algolia")
-            except Exception as e:
-                logger.error(f"Error syncing opportunity {doc_ref.id} to Algolia: {str(e)}")
-                algolia_data = None
+        firestore_data['updatedAt'] = firestore.SERVER_TIMESTAMP
+        
+        # The Algolia outbox entry commits atomically with the document
+        batch = db.batch()
+        batch.set(doc_ref, firestore_data)
+        queued = data.get('status') == 'published' and enqueue_index_op(batch, doc_ref.id, 'upsert')
+        batch.commit()
+        opportunity_cache.invalidate(doc_ref.id)
+        
+        if data.get('status') == 'published':
+            index_opportunity({**data, 'id': doc_ref.id})
+            FacetService.record_change(None, data)
+        
+        # Only published opportunities are queued for Algolia
+        if queued:
+            algolia_indexer.notify()
+            algolia_data = data.copy()
+            algolia_data['objectID'] = doc_ref.id
+            algolia_data['id'] = doc_ref.id  # Ensure id field matches Firestore document ID
         else:
             algolia_data = None
         
@@ -91,56 +491,226 @@ class OpportunityService:
     
     @staticmethod
     def update_opportunity(opportunity_id, data):
-        """Update an existing opportunity"""
+        """
+        Update an existing opportunity, writing only the fields that changed
+        
+        The stored document is read in the same transaction as the write, so
+        the diff is always taken against the latest committed version.
+        """
+        # Buffered autosave deltas are older than this write
+        draft_autosave.flush(opportunity_id)
         doc_ref = db.collection('opportunities').document(opportunity_id)
-        doc_ref.update(data)
         
-        # Handle Algolia based on status
-        if ALGOLIA_AVAILABLE:
+        @firestore.transactional
+        def _update(transaction):
+            snapshot = doc_ref.get(transaction=transaction)
+            current = snapshot.to_dict() if snapshot.exists else None
+            payload = apply_deadline_at(dict(data), current)
+            changes = diff_fields(current, payload) if current is not None else payload
+            if not changes:
+                return current, changes, False
+            
+            before = current if current and current.get('status') == 'published' else None
+            # Published before and after: Algolia only needs the record if it changed
+            push_to_algolia = before is None or algolia_fields_changed(before, changes)
             if data.get('status') == 'published':
-                # Get the full opportunity data from database to ensure we have all fields
-                doc = doc_ref.get()
-                if doc.exists:
-                    full_data = doc.to_dict()
-                    full_data['objectID'] = opportunity_id
-                    # Merge with update data to ensure latest changes are included
-                    full_data.update(data)
-                    algolia_service.save_objects([full_data])
-            elif data.get('status') == 'draft':
+                index_action = 'upsert' if current is not None and push_to_algolia else None
+            elif 'status' in data:
                 # Remove from Algolia if it was published before
-                algolia_service.delete_objects([opportunity_id])
+                index_action = 'delete' if before is not None or data.get('status') == 'draft' else None
+            else:
+                index_action = 'upsert' if before is not None and push_to_algolia else None
+            
+            # Fails with NotFound if the document does not exist
+            transaction.update(doc_ref, {**changes, 'updatedAt': firestore.SERVER_TIMESTAMP})
+            queued = index_action is not None and enqueue_index_op(transaction, opportunity_id, index_action)
+            return current, changes, queued
+        
+        current, changes, queued = _update(db.transaction())
+        if not changes:
+            logger.debug(f"Update of {opportunity_id} changed nothing, skipping write")
+            return True
+        opportunity_cache.invalidate(opportunity_id)
+        if queued:
+            algolia_indexer.notify()
+        
+        before = {**current, 'id': opportunity_id} if current.get('status') == 'published' else None
+        after = {**before, **changes} if before and 'status' not in data else None
+        
+        # Handle local search indexes based on status
+        if data.get('status') == 'published':
+            full_data = {**current, **changes}
+            full_data['id'] = opportunity_id
+            after = full_data.copy()
+            index_opportunity(full_data)
+        elif 'status' in data:
+            unindex_opportunity(opportunity_id)
+        elif after is not None:
+            # Edit of a published opportunity that keeps its status
+            index_opportunity(after)
+        
+        FacetService.record_change(before, after)
         
         return True
     
     @staticmethod
     def delete_opportunity(opportunity_id):
         """Delete an opportunity"""
-        # Delete from Firestore
-        db.collection('opportunities').document(opportunity_id).delete()
+        draft_autosave.discard(opportunity_id)
+        before = OpportunityService.get_published_state(opportunity_id)
         
-        # Delete from Algolia
-        if ALGOLIA_AVAILABLE:
-            algolia_service.delete_objects([opportunity_id])
+        # Delete from Firestore and queue the Algolia removal in the same commit
+        batch = db.batch()
+        batch.delete(db.collection('opportunities').document(opportunity_id))
+        queued = enqueue_index_op(batch, opportunity_id, 'delete')
+        batch.commit()
+        opportunity_cache.invalidate(opportunity_id)
+        unindex_opportunity(opportunity_id)
+        FacetService.record_change(before, None)
+        EngagementService.delete_counts(opportunity_id)
+        if queued:
+            algolia_indexer.notify()
         
         return True
     
     @staticmethod
-    def sync_to_algolia():
-        """Sync all published Firestore opportunities to Algolia"""
+    def sync_to_algolia(full=False):
+        """
+        Sync Firestore opportunities to Algolia
+        
+        Incremental by default: only documents whose updatedAt is past the last
+        sync watermark are read; published ones are re-indexed and the rest are
+        deleted from Algolia. A full rebuild pushes every published opportunity
+        and removes Algolia records that no longer have one. Without a stored
+        watermark the sync is always full.
+        
+        The watermark advances unless a chunk failed for a transient reason or
+        a delete failed. objectIDs Algolia rejected (400/413) do not hold it
+        back: they are kept in a retry list that each run re-reads alongside
+        its changed documents.
+        
+        Returns:
+            Dict with mode, indexed/failed/deleted counts and per-chunk outcomes
+        """
+        sync_ref = db.collection(ALGOLIA_SYNC_DOC_PATH[0]).document(ALGOLIA_SYNC_DOC_PATH[1])
+        state = sync_ref.get()
+        state = (state.to_dict() or {}) if state.exists else {}
+        watermark = None if full else state.get('watermark')
+        retry_ids = state.get('retry_ids') or []
+        mode = 'incremental' if watermark else 'full'
+        result = {"mode": mode, "indexed": 0, "failed": 0, "deleted": 0, "chunks": []}
+        if not ALGOLIA_AVAILABLE:
+            return result
+        
+        # Writes committed after this instant are picked up by the next run
+        started_at = datetime.now(timezone.utc)
         opportunities_ref = db.collection('opportunities')
-        # Only sync published opportunities
-        docs = opportunities_ref.where('status', '==', 'published').stream()
+        if watermark:
+            docs = opportunities_ref.where('updatedAt', '>=', watermark - SYNC_WATERMARK_OVERLAP).stream()
+        else:
+            docs = opportunities_ref.where('status', '==', 'published').stream()
         
         records = []
-        for doc in docs:
+        removed = []
+        seen = set()
+        retry_docs = db.get_all([opportunities_ref.document(object_id) for object_id in retry_ids]) if retry_ids else []
+        for doc in list(docs) + list(retry_docs):
+            if doc.id in seen:
+                continue
+            seen.add(doc.id)
+            if not doc.exists:
+                removed.append(doc.id)
+                continue
             data = doc.to_dict()
+            if data.get('status') != 'published':
+                removed.append(doc.id)
+                continue
             data['id'] = doc.id
             records.append(data)
         
-        if records and ALGOLIA_AVAILABLE:
-            return algolia_service.sync_all(records)
+        if not watermark:
+            # Records whose document was deleted or unpublished before the rebuild
+            published_ids = {record['id'] for record in records}
+            removed = [object_id for object_id in algolia_service.browse_object_ids()
+                       if object_id not in published_ids]
+        
+        report = algolia_service.bulk_index(records) if records else {"indexed": 0, "failed": 0, "chunks": []}
+        indexed = report['indexed']
+        deleted_ok = algolia_service.delete_objects(removed) if removed else True
+        result.update(indexed=indexed, failed=report['failed'], chunks=report['chunks'],
+                      deleted=len(removed) if deleted_ok else 0)
+        
+        rejected_ids = [object_id for chunk in report['chunks'] if chunk.get('rejected')
+                        for object_id in chunk['objectIDs']]
+        result['rejected'] = rejected_ids
+        # Records Algolia rejected would fail the same way on every run; they move
+        # to the retry list instead of holding the watermark back
+        transient = 'error' in report or any(
+            not chunk['success'] and not chunk.get('rejected') for chunk in report['chunks']
+        )
+        if not transient and deleted_ok:
+            sync_ref.set({
+                'watermark': started_at,
+                'mode': mode,
+                'indexed': indexed,
+                'deleted': len(removed),
+                'retry_ids': sorted(set(rejected_ids)),
+                'updatedAt': firestore.SERVER_TIMESTAMP
+            })
+            if rejected_ids:
+                logger.warning(f"Algolia rejected {len(rejected_ids)} records, kept for retry")
         else:
-            return 0
+            # Never move past records that failed transiently; remember the ones
+            # Algolia rejected, and keep earlier retries that still did not
+            # make it, so they are re-read even once the watermark moves on
+            if 'error' in report:
+                failed_ids = {record['id'] for record in records}
+            else:
+                failed_ids = {object_id for chunk in report['chunks'] if not chunk['success']
+                              for object_id in chunk['objectIDs']}
+            if not deleted_ok:
+                failed_ids.update(removed)
+            pending = set(rejected_ids) | (set(retry_ids) & failed_ids)
+            sync_ref.set({
+                'retry_ids': sorted(pending),
+                'lastFailure': report.get('error') or f"{report['failed']} records not indexed",
+                'updatedAt': firestore.SERVER_TIMESTAMP
+            }, merge=True)
+            logger.warning(f"Algolia {mode} sync incomplete, keeping the previous watermark")
+        
+        logger.info(f"Algolia {mode} sync: indexed {indexed}, deleted {result['deleted']}")
+        return result
+    
+    @staticmethod
+    def search_opportunities(query, limit=DEFAULT_PAGE_SIZE, type=None):
+        """Full-text search over published opportunities using the local index"""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        local_search_index.ensure_built(lambda: OpportunityService.get_all_opportunities(status='published'))
+        return local_search_index.search(query, limit=limit, type=type)
+    
+    @staticmethod
+    def get_related_opportunities(opportunity_id, limit=DEFAULT_TOP_K):
+        """
+        Get precomputed related opportunities, best match first
+        
+        Returns an empty list until the background build (started by the app)
+        has finished; requests never load or score the catalogue themselves.
+        """
+        limit = max(1, min(int(limit), DEFAULT_TOP_K))
+        if not related_index.is_built:
+            return []
+        
+        neighbours = related_index.get_related(opportunity_id, limit=limit)
+        opportunities = OpportunityService.get_opportunities_by_ids([other_id for other_id, _ in neighbours])
+        
+        related = []
+        for (other_id, score), data in zip(neighbours, opportunities):
+            if data is not None and data.get('status') == 'published':
+                card = {field: data[field] for field in CARD_FIELDS if field in data}
+                card['id'] = other_id
+                card['similarity'] = score
+                related.append(card)
+        return related
     
     @staticmethod
     def get_user_opportunities(user_id, status=None):
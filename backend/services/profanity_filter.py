@@ -0,0 +1,205 @@
+"""Local profanity pre-filter run before LLM moderation (Indonesian + English lexicon)"""
+import bisect
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Unambiguous profanity: a hit rejects without asking the model
+STRONG_TERMS = [
+    # English
+    'fuck', 'motherfucker', 'fck', 'shit', 'bullshit', 'cunt', 'bitch', 'son of a bitch',
+    'asshole', 'dickhead', 'wanker', 'twat', 'whore', 'slut',
+    # Indonesian / Javanese
+    'kontol', 'memek', 'ngentot', 'entot', 'ngewe', 'jancok', 'jancuk', 'bangsat',
+    'pepek', 'lonte', 'pantek', 'pukimak', 'puki', 'tempik', 'jembut', 'kimak', 'anak haram',
+]
+
+# Words that are profane only in some contexts (e.g. 'anjing' is also just "dog",
+# 'babi' is "pig"); a hit sends the text to the model instead of rejecting
+AMBIGUOUS_TERMS = [
+    # English
+    'damn', 'dick', 'cock', 'pussy', 'bastard', 'crap', 'piss', 'retard',
+    # Indonesian / Javanese
+    'anjing', 'anjir', 'anjay', 'babi', 'asu', 'tai', 'taik', 'goblok', 'tolol', 'bego',
+    'bajingan', 'kampret', 'brengsek', 'keparat', 'sialan', 'peler', 'titit', 'perek',
+    'bencong', 'jablay', 'cok', 'dumbass', 'jackass',
+]
+
+# Inflections allowed after a term ("fucking", "kontolnya", "ngentotin")
+SUFFIXES = frozenset({
+    's', 'es', 'ed', 'er', 'ers', 'ing', 'in', 'y', 'ty', 'head', 'face',
+    'nya', 'an', 'kan', 'lah', 'mu', 'ku', 'lu',
+})
+
+# Real words that contain a term ("kue pukis", "cocker spaniel", "Scunthorpe");
+# a hit that does not cover its whole word is only reported if the word is not listed here
+BENIGN_WORDS = frozenset({
+    'pukis', 'cocker', 'cokes', 'scunthorpe', 'shiitake', 'memekarkan', 'pantekosta',
+})
+
+LEET_MAP = str.maketrans({
+    '0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't', '8': 'b', '9': 'g',
+    '@': 'a', '$': 's', '!': 'i', '|': 'i', '+': 't', '€': 'e',
+})
+
+_WORD_RE = re.compile(r'\S+')
+_MASKED_RE = re.compile(r'[a-z][*#]+[a-z]', re.IGNORECASE)
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+_REPEAT_RE = re.compile(r'(.)\1+')
+
+# Punctuation stripped from word edges before leetspeak is undone ("k0nt0l!")
+EDGE_PUNCTUATION = '.,!?;:"\'()[]{}<>'
+
+def normalize_word(word: str) -> str:
+    """Lowercase, strip accents, undo leetspeak and separators, collapse repeated letters"""
+    word = unicodedata.normalize('NFKD', word).encode('ascii', 'ignore').decode('ascii').lower()
+    word = word.strip(EDGE_PUNCTUATION)
+    if any(ch.isalpha() for ch in word):
+        word = word.translate(LEET_MAP)
+    word = _NON_ALNUM_RE.sub('', word)
+    return _REPEAT_RE.sub(r'\1', word)
+
+def normalize_term(term: str) -> str:
+    return ' '.join(normalize_word(word) for word in term.split())
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every occurrence of every pattern in one pass"""
+
+    def __init__(self, patterns: Dict[str, object]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, object]]] = [[]]
+        for pattern, payload in patterns.items():
+            self._add(pattern, payload)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, payload):
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._output[state].append((len(pattern), payload))
+
+    def _build_failure_links(self):
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, object]]:
+        """Yield (start, end, payload) for every pattern occurrence"""
+        state = 0
+        for index, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, payload in self._output[state]:
+                yield index + 1 - length, index + 1, payload
+
+@dataclass
+class ScreenResult:
+    """Outcome of the local pre-filter"""
+    verdict: str  # 'reject', 'ambiguous' or 'clean'
+    hits: List[Tuple[str, str]] = field(default_factory=list)  # (field, offending text)
+    signals: List[str] = field(default_factory=list)  # Why the text is ambiguous
+
+class ProfanityFilter:
+    """Word-boundary aware lexicon matcher over normalized text"""
+
+    def __init__(self, strong_terms: Iterable[str] = STRONG_TERMS,
+                 ambiguous_terms: Iterable[str] = AMBIGUOUS_TERMS,
+                 benign_words: Iterable[str] = BENIGN_WORDS):
+        self._benign = frozenset(normalize_word(word) for word in benign_words)
+        patterns = {normalize_term(term): 'ambiguous' for term in ambiguous_terms}
+        patterns.update({normalize_term(term): 'strong' for term in strong_terms})
+        self._matcher = AhoCorasick(patterns)
+
+    def scan(self, text: str) -> Tuple[List[Tuple[str, str]], bool]:
+        """
+        Find lexicon hits in text
+
+        Returns:
+            Tuple of ([(severity, original words)], whether masked words like "f**k" were seen)
+        """
+        raw_words = _WORD_RE.findall(text or '')
+        masked = any(_MASKED_RE.search(word) for word in raw_words)
+
+        # Rejoin spelled-out words ("f u c k") before matching
+        words, norms, run = [], [], []
+        for word in raw_words + [None]:
+            norm = normalize_word(word) if word is not None else None
+            if norm is not None and len(norm) == 1:
+                run.append((word, norm))
+                continue
+            if len(run) >= 3:
+                words.append(' '.join(w for w, _ in run))
+                norms.append(''.join(n for _, n in run))
+            else:
+                words.extend(w for w, _ in run)
+                norms.extend(n for _, n in run)
+            run = []
+            if word is not None:
+                words.append(word)
+                norms.append(norm)
+
+        normalized, starts, ends = [], [], []
+        position = 0
+        for norm in norms:
+            starts.append(position)
+            normalized.append(norm)
+            position += len(norm)
+            ends.append(position)
+            position += 1
+        joined = ' '.join(normalized)
+
+        hits = []
+        for start, end, severity in self._matcher.iter_matches(joined):
+            first = bisect.bisect_right(starts, start) - 1
+            last = next(i for i in range(first, len(ends)) if ends[i] >= end)
+            whole_word = starts[first] == start and ends[last] == end
+            inflected = starts[first] == start and joined[end:ends[last]] in SUFFIXES
+            if not whole_word and joined[starts[first]:ends[last]] in self._benign:
+                continue  # A real word, not an inflected term
+            if not (whole_word or inflected):
+                if severity != 'strong':
+                    continue  # Part of a longer, different word
+                # A strong term inside a longer word ("shithole", "clusterfuck") may
+                # still be profane; let the model decide
+                severity = 'ambiguous'
+            hits.append((severity, ' '.join(words[first:last + 1])))
+        return hits, masked
+
+    def screen(self, fields: Dict[str, str]) -> ScreenResult:
+        """Classify submitted fields as clearly profane, ambiguous or clean"""
+        strong, ambiguous, signals = [], [], []
+        for name, text in fields.items():
+            hits, masked = self.scan(str(text or ''))
+            for severity, words in hits:
+                target = strong if severity == 'strong' else ambiguous
+                if (name, words) not in target:
+                    target.append((name, words))
+            if masked:
+                signals.append(f"masked word in {name}")
+        if strong:
+            return ScreenResult('reject', strong, signals)
+        if ambiguous:
+            signals.extend(f"context-dependent word in {name}" for name, _ in ambiguous)
+        if signals:
+            return ScreenResult('ambiguous', ambiguous, signals)
+        return ScreenResult('clean')
+
+# Global instance
+profanity_filter = ProfanityFilter()
@@ -0,0 +1,226 @@
+"""Precomputed related opportunities from tag/type/organization similarity"""
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+from utils.logging_config import logger
+
+DEFAULT_TOP_K = 10
+# Background build retries after a failed load, doubling up to the cap
+BUILD_RETRY_DELAY = 5
+MAX_BUILD_RETRY_DELAY = 300
+
+# Feature weights for weighted Jaccard similarity
+FEATURE_WEIGHTS = {
+    'tag': 1.0,
+    'org': 1.0,
+    'type': 0.5,
+}
+
+# Features used to find candidates; type is too broad and only affects scoring
+CANDIDATE_FEATURE_KINDS = ('tag', 'org')
+# Opportunities considered per feature, so a popular tag does not make scoring quadratic
+MAX_CANDIDATES_PER_FEATURE = 200
+
+def _features(doc: dict) -> Set[Tuple[str, str]]:
+    """Extract (kind, value) features from an opportunity"""
+    features = set()
+    tags = doc.get('tags') or []
+    if isinstance(tags, list):
+        features.update(('tag', str(tag).strip().lower()) for tag in tags if str(tag).strip())
+    if doc.get('organization'):
+        features.add(('org', str(doc['organization']).strip().lower()))
+    if doc.get('type'):
+        features.add(('type', str(doc['type'])))
+    return features
+
+def _similarity(a: Set[Tuple[str, str]], b: Set[Tuple[str, str]]) -> float:
+    """Weighted Jaccard similarity between two feature sets"""
+    union = a | b
+    if not union:
+        return 0.0
+    shared = sum(FEATURE_WEIGHTS[kind] for kind, _ in a & b)
+    return shared / sum(FEATURE_WEIGHTS[kind] for kind, _ in union)
+
+def _candidates(doc_id: str, features: Dict[str, Set[Tuple[str, str]]],
+                inverted: Dict[Tuple[str, str], Set[str]]) -> Set[str]:
+    candidates = set()
+    for feature in features.get(doc_id, ()):
+        if feature[0] in CANDIDATE_FEATURE_KINDS:
+            candidates.update(itertools.islice(inverted.get(feature, ()), MAX_CANDIDATES_PER_FEATURE))
+    candidates.discard(doc_id)
+    return candidates
+
+def _top_neighbours(doc_id: str, features: Dict[str, Set[Tuple[str, str]]],
+                    inverted: Dict[Tuple[str, str], Set[str]], top_k: int) -> List[Tuple[float, str]]:
+    own = features[doc_id]
+    scored = (
+        (_similarity(own, features[other_id]), other_id)
+        for other_id in _candidates(doc_id, features, inverted)
+    )
+    return heapq.nlargest(top_k, (item for item in scored if item[0] > 0))
+
+class RelatedIndex:
+    """
+    Inverted feature index holding the top-K most similar opportunities per opportunity.
+
+    Updating one opportunity only recomputes its own list, offers it to the
+    candidates sharing a feature with it, and recomputes the lists that
+    referenced it before the change.
+
+    Writers are serialized by a lock that readers never take: neighbour lists
+    are replaced rather than mutated, and a rebuild computes into fresh
+    structures that are swapped in at the end, so get_related never waits
+    for scoring.
+    """
+
+    def __init__(self, top_k: int = DEFAULT_TOP_K):
+        self.top_k = top_k
+        self._features: Dict[str, Set[Tuple[str, str]]] = {}
+        self._inverted: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        # Store: {doc_id: [(score, neighbour_id), ...]} best first
+        self._neighbours: Dict[str, List[Tuple[float, str]]] = {}
+        # Store: {doc_id: ids whose neighbour list contains doc_id}
+        self._referenced_by: Dict[str, Set[str]] = defaultdict(set)
+        self._write_lock = threading.RLock()
+        self.is_built = False
+
+    def __len__(self):
+        return len(self._features)
+
+    def get_related(self, doc_id: str, limit: int = DEFAULT_TOP_K) -> List[Tuple[str, float]]:
+        """Return up to limit (neighbour_id, score) pairs, best first"""
+        return [(other_id, round(score, 4)) for score, other_id in self._neighbours.get(doc_id, [])[:limit]]
+
+    def _candidates(self, doc_id: str) -> Set[str]:
+        return _candidates(doc_id, self._features, self._inverted)
+
+    def _set_neighbours(self, doc_id: str, neighbours: List[Tuple[float, str]]):
+        for _, other_id in self._neighbours.get(doc_id, []):
+            self._referenced_by[other_id].discard(doc_id)
+        self._neighbours[doc_id] = neighbours
+        for _, other_id in neighbours:
+            self._referenced_by[other_id].add(doc_id)
+
+    def _recompute(self, doc_id: str):
+        self._set_neighbours(doc_id, _top_neighbours(doc_id, self._features, self._inverted, self.top_k))
+
+    def _offer(self, doc_id: str, other_id: str, score: float):
+        """Insert other_id into doc_id's list if it now qualifies"""
+        neighbours = [item for item in self._neighbours.get(doc_id, []) if item[1] != other_id]
+        if score > 0:
+            neighbours.append((score, other_id))
+        self._set_neighbours(doc_id, heapq.nlargest(self.top_k, neighbours))
+
+    def upsert(self, doc: dict):
+        """Index or re-index a published opportunity (must contain 'id' or 'objectID')"""
+        doc_id = doc.get('id') or doc.get('objectID')
+        if not doc_id:
+            return
+        features = _features(doc)
+        with self._write_lock:
+            previous_referrers = set(self._referenced_by.get(doc_id, ()))
+            self._unindex_features(doc_id)
+            self._features[doc_id] = features
+            for feature in features:
+                self._inverted[feature].add(doc_id)
+
+            self._recompute(doc_id)
+            candidates = self._candidates(doc_id)
+            for other_id in candidates:
+                score = _similarity(self._features[other_id], features)
+                old_score = next((item[0] for item in self._neighbours.get(other_id, []) if item[1] == doc_id), None)
+                if old_score is not None and score < old_score:
+                    # A previously evicted candidate may now outrank this one
+                    self._recompute(other_id)
+                else:
+                    self._offer(other_id, doc_id, score)
+            # Lists that held the old version may now prefer someone else
+            for other_id in previous_referrers - candidates:
+                if other_id in self._features:
+                    self._recompute(other_id)
+
+    def remove(self, doc_id: str):
+        """Drop an opportunity and repair every list that referenced it"""
+        with self._write_lock:
+            if doc_id not in self._features:
+                return
+            referrers = set(self._referenced_by.get(doc_id, ()))
+            self._unindex_features(doc_id)
+            self._set_neighbours(doc_id, [])
+            del self._neighbours[doc_id]
+            del self._features[doc_id]
+            self._referenced_by.pop(doc_id, None)
+            for other_id in referrers:
+                if other_id in self._features:
+                    self._recompute(other_id)
+
+    def _unindex_features(self, doc_id: str):
+        for feature in self._features.get(doc_id, ()):
+            postings = self._inverted.get(feature)
+            if postings is not None:
+                postings.discard(doc_id)
+                if not postings:
+                    del self._inverted[feature]
+
+    def rebuild(self, docs: Iterable[dict]):
+        """Replace the whole index and recompute every neighbour list"""
+        with self._write_lock:
+            features: Dict[str, Set[Tuple[str, str]]] = {}
+            inverted: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+            for doc in docs:
+                doc_id = doc.get('id') or doc.get('objectID')
+                if not doc_id:
+                    continue
+                features[doc_id] = _features(doc)
+                for feature in features[doc_id]:
+                    inverted[feature].add(doc_id)
+            neighbours = {doc_id: _top_neighbours(doc_id, features, inverted, self.top_k) for doc_id in features}
+            referenced_by: Dict[str, Set[str]] = defaultdict(set)
+            for doc_id, items in neighbours.items():
+                for _, other_id in items:
+                    referenced_by[other_id].add(doc_id)
+
+            # Neighbours last: a reader then sees either the old lists or the complete new ones
+            self._features, self._inverted, self._referenced_by = features, inverted, referenced_by
+            self._neighbours = neighbours
+            self.is_built = True
+        logger.info(f"Related opportunities index built with {len(self)} opportunities")
+
+    def ensure_built(self, loader: Callable[[], Iterable[dict]]):
+        """Build the index from loader() the first time it is needed"""
+        if self.is_built:
+            return
+        with self._write_lock:
+            if not self.is_built:
+                self.rebuild(loader())
+
+    def start_background_build(self, loader: Callable[[], Iterable[dict]], wait_for: Callable[[], bool] = None,
+                               retry_delay: float = BUILD_RETRY_DELAY):
+        """
+        Build the index in a daemon thread, optionally after wait_for() returns
+
+        Readers get empty lists until the build has finished, so a failed build
+        is retried with exponential backoff (capped at MAX_BUILD_RETRY_DELAY).
+        """
+        def _build():
+            if wait_for is not None:
+                try:
+                    wait_for()
+                except Exception as e:
+                    logger.error(f"Error waiting to build related opportunities index: {str(e)}")
+            delay = retry_delay
+            while not self.is_built:
+                try:
+                    self.ensure_built(loader)
+                except Exception as e:
+                    logger.error(f"Error building related opportunities index, retrying in {delay:g}s: {str(e)}")
+                    time.sleep(delay)
+                    delay = min(delay * 2, MAX_BUILD_RETRY_DELAY)
+
+        threading.Thread(target=_build, name='related-index-build', daemon=True).start()
+
+# Global instance
+related_index = RelatedIndex()
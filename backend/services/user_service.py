@@ -1,6 +1,8 @@
 """User service - Business logic for user operations"""
 from firebase_admin import auth, firestore
 from config.settings import db
+from services.opportunity_service import OpportunityService
+from services.engagement_service import EngagementService
 
 class UserService:
     """Service for user operations"""
@@ -121,37 +123,43 @@ class UserService:
         user_data = user_doc.to_dict()
         bookmark_ids = user_data.get('bookmarks', [])
         
-        # Fetch opportunity details
-        opportunities = []
-        for opp_id in bookmark_ids:
-            opp_doc = db.collection('opportunities').document(opp_id).get()
-            if opp_doc.exists:
-                opp_data = opp_doc.to_dict()
-                opp_data['id'] = opp_doc.id
-                opportunities.append(opp_data)
-        
-        return opportunities
+        # Fetch opportunity details in bulk
+        opportunities = OpportunityService.get_opportunities_by_ids(bookmark_ids)
+        return [opp for opp in opportunities if opp is not None]
     
     @staticmethod
     def add_bookmark(user_id, opportunity_id):
         """Add an opportunity to user's bookmarks"""
-        user_ref = db.collection('users').document(user_id)
-        user_ref.set({
-            'bookmarks': firestore.ArrayUnion([opportunity_id])
-        }, merge=True)
+        if UserService._set_bookmarked(user_id, opportunity_id, True):
+            EngagementService.record_bookmark(opportunity_id, added=True)
         
         return True
     
     @staticmethod
     def remove_bookmark(user_id, opportunity_id):
         """Remove an opportunity from user's bookmarks"""
-        user_ref = db.collection('users').document(user_id)
-        user_ref.set({
-            'bookmarks': firestore.ArrayRemove([opportunity_id])
-        }, merge=True)
+        if UserService._set_bookmarked(user_id, opportunity_id, False):
+            EngagementService.record_bookmark(opportunity_id, added=False)
         
         return True
     
+    @staticmethod
+    def _set_bookmarked(user_id, opportunity_id, bookmarked):
+        """Add or remove a bookmark; returns True only if the user's bookmarks changed"""
+        user_ref = db.collection('users').document(user_id)
+        
+        @firestore.transactional
+        def _apply(transaction):
+            snapshot = user_ref.get(transaction=transaction)
+            current = (snapshot.to_dict() or {}).get('bookmarks', []) if snapshot.exists else []
+            if (opportunity_id in current) == bookmarked:
+                return False
+            change = firestore.ArrayUnion([opportunity_id]) if bookmarked else firestore.ArrayRemove([opportunity_id])
+            transaction.set(user_ref, {'bookmarks': change}, merge=True)
+            return True
+        
+        return _apply(db.transaction())
+    
     @staticmethod
     def get_activity(user_id):
         """Get user activity"""
@@ -203,13 +211,10 @@ class UserService:
         user_data = user_doc.to_dict()
         application_ids = user_data.get('applications', [])
         
-        # Fetch opportunity details for applications
+        # Fetch opportunity details for applications in bulk
         applications = []
-        for opp_id in application_ids:
-            opp_doc = db.collection('opportunities').document(opp_id).get()
-            if opp_doc.exists:
-                opp_data = opp_doc.to_dict()
-                opp_data['id'] = opp_doc.id
+        for opp_data in OpportunityService.get_opportunities_by_ids(application_ids):
+            if opp_data is not None:
                 opp_data['applied_at'] = user_data.get('activity', [])
                 applications.append(opp_data)
         
@@ -0,0 +1,34 @@
+"""
+Tests for coalescing of queued Algolia outbox operations
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.algolia_outbox import coalesce_entries, enqueue_index_op
+
+def test_last_action_wins_per_record():
+    entries = [
+        {'objectID': 'a', 'action': 'upsert'},
+        {'objectID': 'b', 'action': 'upsert'},
+        {'objectID': 'a', 'action': 'upsert'},
+        {'objectID': 'b', 'action': 'delete'},
+        {'objectID': 'c', 'action': 'delete'},
+        {'objectID': 'c', 'action': 'upsert'},
+    ]
+    actions = coalesce_entries(entries)
+    assert actions == {'a': 'upsert', 'b': 'delete', 'c': 'upsert'}, actions
+    # Operations keep the order of their latest entry
+    assert list(actions) == ['a', 'b', 'c'], list(actions)
+
+def test_malformed_entries_are_ignored():
+    assert coalesce_entries([{'objectID': 'x', 'action': 'bogus'}, {'action': 'upsert'}]) == {}
+
+def test_unknown_action_is_refused():
+    with pytest.raises(ValueError):
+        enqueue_index_op(None, 'a', 'reindex')
@@ -23,24 +23,17 @@ async def test_algolia_search():
         # Test search
         print("1. Testing search in Algolia...")
         
-        # Use the search client directly
-        search_client = algolia_service.client
-        
-        # Search for all opportunities using the correct API
-        search_results = await search_client.search_single_index(
-            index_name="opportunities",
-            search_params={
-                "query": "",
-                "hitsPerPage": 10
-            }
+        # Query the index through the service's shared REST session
+        search_results = algolia_service.transport.search(
+            algolia_service.index_name, {"query": "", "hitsPerPage": 10}
         )
         
         print(f"   [OK] Search completed")
         print(f"   [INFO] Results: {search_results}")
         
         # Check if we have hits
-        if 'results' in search_results and len(search_results['results']) > 0:
-            hits = search_results['results'][0].get('hits', [])
+        hits = search_results.get('hits', [])
+        if hits:
             print(f"   [OK] Found {len(hits)} opportunities in Algolia")
             
             for hit in hits:
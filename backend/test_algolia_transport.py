@@ -0,0 +1,147 @@
+"""
+Tests for the pooled Algolia HTTP transport against a local stub server
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.algolia_transport import AlgoliaFatalError, AlgoliaTransport, chunk_operations
+
+class StubAlgolia(BaseHTTPRequestHandler):
+    """Answers /batch, /clear and /browse like Algolia, failing on request"""
+    protocol_version = 'HTTP/1.1'  # Keep connections alive
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        server.calls.append((self.path, body, self.client_address[1], self.headers.get('X-Algolia-API-Key')))
+
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            self._respond(server, body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _respond(self, server, body):
+        operations = body.get('requests', [])
+        if server.failures:
+            status = server.failures.pop(0)
+            self._reply(status, {"message": "try again"}, {'Retry-After': '0'})
+        elif any(op.get('body', {}).get('objectID') == 'bad' for op in operations):
+            self._reply(400, {"message": "Record is too big"})
+        elif self.path.endswith('/browse'):
+            if body.get('cursor'):
+                self._reply(200, {"hits": [{"objectID": "c"}]})
+            else:
+                self._reply(200, {"hits": [{"objectID": "a"}, {"objectID": "b"}], "cursor": "page-2"})
+        else:
+            time.sleep(server.delay)
+            self._reply(200, {"taskID": len(server.calls)})
+
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub():
+    """Stub server and a transport pointed at it, without backoff sleeps"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubAlgolia)
+    server.calls = []
+    server.failures = []
+    server.lock = threading.Lock()
+    server.active = server.peak = 0
+    server.delay = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    transport = AlgoliaTransport('APPID', 'secret', base_url=f"http://127.0.0.1:{server.server_port}",
+                                 read_timeout=5, max_retries=3, backoff=0)
+    yield server, transport
+    transport.close()
+    server.shutdown()
+
+def test_calls_share_one_keep_alive_connection(stub):
+    server, transport = stub
+    for i in range(5):
+        transport.batch('opportunities', [{"action": "deleteObject", "body": {"objectID": str(i)}}])
+    assert len(server.calls) == 5
+    assert len({port for _, _, port, _ in server.calls}) == 1, "new connection per call"
+    path, body, _, api_key = server.calls[0]
+    assert path == '/1/indexes/opportunities/batch' and api_key == 'secret'
+    assert body == {"requests": [{"action": "deleteObject", "body": {"objectID": "0"}}]}
+
+def test_retries_on_429_and_5xx(stub):
+    server, transport = stub
+    server.failures.extend([429, 503])
+    result = transport.clear('opportunities')
+    assert len(server.calls) == 3 and result.get('taskID') == 3, server.calls
+    assert server.calls[-1][0] == '/1/indexes/opportunities/clear'
+
+def test_exhausted_retries_raise(stub):
+    server, transport = stub
+    server.failures.extend([500] * 4)
+    with pytest.raises(Exception, match='500'):
+        transport.batch('opportunities', [])
+
+def test_browse_follows_cursor(stub):
+    server, transport = stub
+    ids = [hit['objectID'] for hit in transport.browse('opportunities', {'attributesToRetrieve': ['objectID']})]
+    assert ids == ['a', 'b', 'c'], ids
+    assert server.calls[1][1] == {'cursor': 'page-2'}
+
+def test_chunks_respect_count_and_byte_limits():
+    operations = [{"action": "addObject", "body": {"objectID": str(i), "text": "x" * (i % 7) * 100}}
+                  for i in range(250)]
+    chunks = chunk_operations(operations, max_records=40, max_bytes=4000)
+    assert [op for chunk, _ in chunks for op in chunk] == operations
+    assert all(len(chunk) <= 40 and size <= 4000 for chunk, size in chunks), [(len(c), s) for c, s in chunks]
+    assert all(len(json.dumps(chunk, separators=(',', ':'))) <= 4000 for chunk, _ in chunks)
+    huge = [{"action": "addObject", "body": {"objectID": "big", "text": "y" * 5000}}]
+    assert len(chunk_operations(huge + operations[:3], max_records=40, max_bytes=4000)) == 2
+
+def test_bulk_isolates_bad_record_with_bounded_concurrency(stub):
+    server, transport = stub
+    server.delay = 0.05
+    operations = [{"action": "addObject", "body": {"objectID": str(i)}} for i in range(100)]
+    operations[37]["body"]["objectID"] = "bad"
+    outcomes = transport.bulk_batch('opportunities', operations, max_records=10, concurrency=3)
+    failed = [outcome for outcome in outcomes if not outcome["success"]]
+    assert len(failed) == 1 and failed[0]["objectIDs"] == ["bad"] and failed[0]["rejected"], failed
+    assert sum(outcome["records"] for outcome in outcomes if outcome["success"]) == 99
+    assert 1 < server.peak <= 3, server.peak
+
+def test_bulk_resends_chunk_after_transport_gives_up(stub):
+    server, transport = stub
+    server.failures.extend([503] * 4)
+    operations = [{"action": "addObject", "body": {"objectID": str(i)}} for i in range(5)]
+    outcomes = transport.bulk_batch('opportunities', operations, chunk_retries=1)
+    assert outcomes[0]["success"] and outcomes[0]["attempts"] == 2, outcomes
+
+def test_bulk_auth_failure_stops_the_run(stub):
+    server, transport = stub
+    server.failures.extend([401] * 50)
+    operations = [{"action": "addObject", "body": {"objectID": str(i)}} for i in range(100)]
+    with pytest.raises(AlgoliaFatalError) as error:
+        transport.bulk_batch('opportunities', operations, max_records=10, concurrency=1)
+    assert error.value.status == 401
+    assert len(server.calls) == 1, len(server.calls)
@@ -0,0 +1,95 @@
+"""
+Tests for draft autosave delta parsing and coalescing
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.draft_autosave_service import DraftAutosaveBuffer, DELETE, parse_delta
+
+EDITABLE = {'title', 'description', 'tags', 'social_media'}
+
+def _recording_buffer(window=60):
+    writes = []
+    buffer = DraftAutosaveBuffer(window=window, writer=lambda opp_id, uid, ch: writes.append((opp_id, uid, dict(ch))) or True)
+    return buffer, writes
+
+def test_parse_json_patch_and_plain_object():
+    changes = parse_delta([
+        {'op': 'replace', 'path': '/title', 'value': 'Robotics Camp'},
+        {'op': 'add', 'path': '/social_media/instagram', 'value': '@camp'},
+        {'op': 'remove', 'path': '/description'},
+    ], EDITABLE)
+    assert changes == {'title': 'Robotics Camp', 'social_media.instagram': '@camp', 'description': DELETE}, changes
+    assert parse_delta({'tags': ['stem']}, EDITABLE) == {'tags': ['stem']}
+
+@pytest.mark.parametrize('bad', [
+    [{'op': 'replace', 'path': '/status', 'value': 'published'}],
+    [{'op': 'replace', 'path': '/tags/0', 'value': 'x'}],
+    [{'op': 'move', 'path': '/title'}],
+    [],
+])
+def test_invalid_delta_is_rejected(bad):
+    with pytest.raises(ValueError):
+        parse_delta(bad, EDITABLE)
+
+def test_rapid_saves_coalesce_into_one_write():
+    buffer, writes = _recording_buffer()
+    current = {'title': 'Old', 'description': 'Same', 'social_media': {'website': 'a.id'}}
+    buffer.submit('draft-1', 'user-1', {'title': 'R'}, current=current)
+    buffer.submit('draft-1', 'user-1', {'title': 'Ro', 'description': 'Same'}, current=current)
+    buffer.submit('draft-1', 'user-1', {'social_media.twitter': '@ro'}, current=current)
+    buffer.submit('draft-1', 'user-1', {'title': 'Robotics'}, current=current)
+    assert buffer.pending_paths('draft-1') == ['social_media.twitter', 'title']
+    assert buffer.flush_due() == 0 and not writes
+    assert buffer.flush('draft-1') == 1
+    assert writes == [('draft-1', 'user-1', {'title': 'Robotics', 'social_media.twitter': '@ro'})], writes
+
+def test_child_writes_fold_into_buffered_parent():
+    buffer, writes = _recording_buffer()
+    buffer.submit('draft-1', 'user-1', {'social_media.twitter': '@a'})
+    buffer.submit('draft-1', 'user-1', {'social_media': {'website': 'b.id'}})
+    buffer.submit('draft-1', 'user-1', {'social_media.instagram': '@b'})
+    buffer.flush()
+    assert writes[0][2] == {'social_media': {'website': 'b.id', 'instagram': '@b'}}, writes
+
+def test_unchanged_delta_is_skipped():
+    buffer, _ = _recording_buffer()
+    assert buffer.submit('draft-1', 'user-1', {'title': 'Old'}, current={'title': 'Old'}) is None
+
+def test_due_drafts_are_flushed_after_the_window():
+    buffer, writes = _recording_buffer(window=0.05)
+    buffer.submit('draft-2', 'user-1', {'title': 'New'})
+    time.sleep(0.1)
+    assert buffer.flush_due() == 1 and writes == [('draft-2', 'user-1', {'title': 'New'})]
+
+def test_failed_write_keeps_changes_buffered():
+    attempts = []
+
+    def flaky_writer(opp_id, uid, changes):
+        attempts.append(dict(changes))
+        if len(attempts) == 1:
+            raise RuntimeError("deadline exceeded")
+        return True
+
+    buffer = DraftAutosaveBuffer(window=60, writer=flaky_writer)
+    buffer.submit('draft-1', 'user-1', {'title': 'Robotics', 'tags': ['stem']})
+    assert buffer.flush('draft-1') == 0
+    assert buffer.pending_paths('draft-1') == ['tags', 'title']
+
+    buffer.submit('draft-1', 'user-1', {'title': 'Robotics Camp'})
+    assert buffer.flush('draft-1') == 1
+    assert attempts[-1] == {'title': 'Robotics Camp', 'tags': ['stem']}, attempts
+    assert buffer.pending_paths('draft-1') == []
+
+def test_refused_write_is_not_retried():
+    buffer = DraftAutosaveBuffer(window=60, writer=lambda opp_id, uid, ch: False)
+    buffer.submit('draft-1', 'user-1', {'title': 'New'})
+    assert buffer.flush('draft-1') == 0
+    assert buffer.pending_paths('draft-1') == []
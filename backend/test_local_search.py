@@ -0,0 +1,45 @@
+"""
+Tests for the local BM25 search index used when Algolia is unavailable
+"""
+
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.local_search_service import LocalSearchIndex, tokenize
+
+def _index():
+    index = LocalSearchIndex()
+    index.rebuild([
+        {'id': 'opp-1', 'title': 'Beasiswa Riset AI', 'description': 'Program riset machine learning',
+         'organization': 'Universitas Indonesia', 'tags': ['ai', 'research'], 'type': 'research'},
+        {'id': 'opp-2', 'title': 'Lomba Desain Poster', 'description': 'Kompetisi desain untuk pelajar',
+         'organization': 'Kementerian Pendidikan', 'tags': ['design', 'competition'], 'type': 'competition'},
+        {'id': 'opp-3', 'title': 'Hackathon AI Nasional', 'description': 'Kompetisi AI untuk mahasiswa',
+         'organization': 'Komunitas AI', 'tags': ['ai', 'hackathon'], 'type': 'competition'},
+    ])
+    return index
+
+def test_tokenize_drops_stopwords_accents_and_hyphens():
+    assert tokenize("Beasiswa untuk Mahasiswa dan Pelajar") == ['beasiswa', 'mahasiswa', 'pelajar']
+    assert tokenize("The Café Research-Program") == ['cafe', 'research', 'program']
+
+def test_bm25_ranking():
+    results = _index().search("riset ai")
+    assert [r['id'] for r in results][0] == 'opp-1', results
+    assert {r['id'] for r in results} == {'opp-1', 'opp-3'}
+
+def test_type_filter():
+    results = _index().search("ai", type='competition')
+    assert [r['id'] for r in results] == ['opp-3']
+
+def test_incremental_updates():
+    index = _index()
+    index.upsert({'id': 'opp-2', 'title': 'Lomba Desain AI', 'tags': ['design'], 'type': 'competition'})
+    assert 'opp-2' in {r['id'] for r in index.search("ai")}
+    assert index.search("poster") == []
+    index.remove('opp-3')
+    assert 'opp-3' not in {r['id'] for r in index.search("hackathon ai")}
+    assert len(index) == 2
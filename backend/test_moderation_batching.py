@@ -0,0 +1,89 @@
+"""
+Tests for batched Gemini moderation: packing, budget splits and per-item fallback
+"""
+
+import os
+import re
+import sys
+
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import moderation_service
+from services.moderation_service import MAX_BATCH_ITEMS, ModerationService
+
+_ITEM_TAG = re.compile(r'<opportunity_submission item="(\d+)">\s*<title>([^<]*)</title>')
+
+def _opportunity(i, title=None):
+    return {'title': title or f"Lomba Sains {i}", 'description': f"Kompetisi ke-{i} untuk pelajar",
+            'organization': 'Komunitas Sains'}
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Stubbed model: records prompts and answers through a replaceable reply function"""
+    calls = []
+
+    def batch_reply(items):
+        return '\n'.join(f"=== ITEM {item} ===\nAPPROVED" for item, _ in items)
+
+    stub = {'batch_reply': batch_reply, 'calls': calls}
+
+    def run(prompt):
+        items = [(int(item), title) for item, title in _ITEM_TAG.findall(prompt)]
+        calls.append(items or 'single')
+        if not items:
+            return "REJECTED\n1. Remove 'x'" if 'Kasar' in prompt else "APPROVED"
+        return stub['batch_reply'](items)
+
+    monkeypatch.setattr(ModerationService, '_run_gemini_safely', staticmethod(run))
+    monkeypatch.setattr(moderation_service, 'GEMINI_API_KEY', 'test-key')
+    # Send everything to the model so batching is exercised
+    monkeypatch.setattr(moderation_service, 'MODERATION_LLM_MODE', 'always')
+    moderation_service._verdict_cache.clear()
+    yield stub
+    moderation_service._verdict_cache.clear()
+
+def test_batch_reply_is_parsed_per_item(gemini):
+    def reply(items):
+        return '\n'.join(
+            f"=== ITEM {item} ===\n" + ("REJECTED\n1. Remove 'x' from title" if 'Kasar' in title else "APPROVED")
+            for item, title in items
+        )
+    gemini['batch_reply'] = reply
+    opportunities = [_opportunity(1), _opportunity(2, "Lomba Kasar"), _opportunity(3)]
+    results = ModerationService.moderate_many(opportunities)
+    assert results == [(True, []), (False, ["Remove 'x' from title"]), (True, [])]
+    assert len(gemini['calls']) == 1
+
+def test_partial_or_garbled_reply_falls_back_to_individual_calls(gemini):
+    # Item 1 is fine, item 2 is garbled, item 3 is missing entirely
+    gemini['batch_reply'] = lambda items: "=== ITEM 1 ===\nAPPROVED\n=== ITEM 2 ===\nI think this one is okay"
+    opportunities = [_opportunity(1), _opportunity(2), _opportunity(3, "Lomba Kasar")]
+    results = ModerationService.moderate_many(opportunities)
+    assert results == [(True, []), (True, []), (False, ["Remove 'x'"])]
+    assert gemini['calls'][1:] == ['single', 'single']
+
+def test_batch_error_retries_every_item(gemini):
+    def fail(items):
+        raise RuntimeError("model unavailable")
+    gemini['batch_reply'] = fail
+    results = ModerationService.moderate_many([_opportunity(1), _opportunity(2)])
+    assert results == [(True, []), (True, [])]
+    assert gemini['calls'][1:] == ['single', 'single']
+
+def test_batches_are_capped_at_max_batch_items(gemini):
+    opportunities = [_opportunity(i) for i in range(2 * MAX_BATCH_ITEMS + 5)]
+    results = ModerationService.moderate_many(opportunities, token_budget=10 ** 9)
+    assert results == [(True, [])] * len(opportunities)
+    assert [len(items) for items in gemini['calls']] == [MAX_BATCH_ITEMS, MAX_BATCH_ITEMS, 5]
+
+def test_batches_are_split_by_token_budget(gemini):
+    item_tokens = moderation_service._estimate_tokens(
+        ModerationService._submission_xml(_opportunity(0), MAX_BATCH_ITEMS))
+    budget = moderation_service._estimate_tokens(moderation_service.BATCH_MODERATION_PROMPT) + 2 * item_tokens
+    opportunities = [_opportunity(i) for i in range(5)]
+    ModerationService.moderate_many(opportunities, token_budget=budget)
+    # Two submissions fit per prompt; the lone last one is sent on its own
+    assert [items if items == 'single' else len(items) for items in gemini['calls']] == [2, 2, 'single']
@@ -0,0 +1,70 @@
+"""
+Tests for the background moderation worker pool
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.moderation_queue import ModerationQueue
+
+def test_submit_does_not_wait_and_jobs_complete():
+    release = threading.Event()
+    done = []
+
+    def slow_handler(opportunity_id, job_id):
+        release.wait(5)
+        done.append((opportunity_id, job_id))
+
+    queue = ModerationQueue(workers=2, handler=slow_handler)
+    started = time.monotonic()
+    futures = [queue.submit(f"opp-{i}", f"job-{i}") for i in range(3)]
+    assert time.monotonic() - started < 0.5
+    assert queue.in_flight == 3
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert sorted(done) == [("opp-0", "job-0"), ("opp-1", "job-1"), ("opp-2", "job-2")], done
+    assert queue.in_flight == 0
+
+def test_handler_errors_are_contained():
+    def failing_handler(opportunity_id, job_id):
+        raise RuntimeError("model unavailable")
+
+    queue = ModerationQueue(workers=1, handler=failing_handler)
+    queue.submit("opp-x", "job-x").result(timeout=5)
+    assert queue.in_flight == 0
+
+def test_failed_jobs_are_retried_with_backoff():
+    calls = []
+    succeeded = threading.Event()
+
+    def flaky_handler(opportunity_id, job_id):
+        calls.append(time.monotonic())
+        if len(calls) < 3:
+            raise RuntimeError("model unavailable")
+        succeeded.set()
+
+    queue = ModerationQueue(workers=1, handler=flaky_handler, retries=3, backoff=0.05)
+    queue.submit("opp-r", "job-r")
+    assert succeeded.wait(5)
+    assert len(calls) == 3
+    assert calls[1] - calls[0] >= 0.05 and calls[2] - calls[1] >= 0.1
+
+def test_retries_are_bounded():
+    calls = []
+
+    def failing_handler(opportunity_id, job_id):
+        calls.append(job_id)
+        raise RuntimeError("model unavailable")
+
+    queue = ModerationQueue(workers=1, handler=failing_handler, retries=2, backoff=0.01)
+    queue.submit("opp-x", "job-x")
+    time.sleep(0.3)
+    assert calls == ["job-x"] * 3
+    assert queue.in_flight == 0
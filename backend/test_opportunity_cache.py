@@ -0,0 +1,42 @@
+"""
+Tests for the LRU+TTL cache used in front of opportunity lookups
+"""
+
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.cache import TTLCache
+
+def test_hits_and_misses_are_counted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    assert cache.get('opp-1') is None
+    cache.set('opp-1', {'title': 'First'})
+    assert cache.get('opp-1') == {'title': 'First'}
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1, stats
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('opp-1', {'title': 'First'})
+    cache.set('opp-2', {'title': 'Second'})
+    cache.get('opp-1')  # opp-2 is now least recently used
+    cache.set('opp-3', {'title': 'Third'})
+    assert cache.get('opp-2') is None
+    assert cache.get('opp-1') is not None
+
+def test_invalidated_entry_is_not_served():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('opp-1', {'title': 'First'})
+    cache.invalidate('opp-1')
+    assert cache.get('opp-1') is None
+
+def test_expired_entry_is_dropped():
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set('opp-1', {'title': 'First'})
+    time.sleep(0.1)
+    assert cache.get('opp-1') is None
+    assert cache.stats()['size'] == 0
@@ -0,0 +1,55 @@
+"""
+Tests for opportunity list cursors and ordering/deadline window resolution
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.opportunity import resolve_list_window
+from utils.pagination import decode_cursor, encode_cursor
+
+NOW = datetime(2026, 3, 1, 5, 0, tzinfo=timezone.utc)
+
+def test_cursor_round_trips_timestamps_and_ids():
+    values = [datetime(2026, 3, 31, 16, 59, 59, tzinfo=timezone.utc), 'opp-1']
+    cursor = encode_cursor(values)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == values
+    assert decode_cursor(encode_cursor([None, 'opp-2'])) == [None, 'opp-2']
+
+@pytest.mark.parametrize('cursor', ['not a cursor', 'W10', 'e30'])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_deadline_order_without_window_starts_now():
+    # Indefinite deadlines are null and Firestore sorts them first; they must not lead the list
+    assert resolve_list_window('deadline', now=NOW) == ('deadline', NOW, None)
+
+def test_other_orderings_have_no_window():
+    assert resolve_list_window(None, now=NOW) == (None, None, None)
+    assert resolve_list_window('createdAt', now=NOW) == ('createdAt', None, None)
+
+def test_window_forces_deadline_order_and_uses_wib_days():
+    order_by, start, end = resolve_list_window(None, '2026-03-01', '2026-03-31', now=NOW)
+    assert order_by == 'deadline'
+    assert start == datetime(2026, 2, 28, 17, 0, tzinfo=timezone.utc)
+    assert end == datetime(2026, 3, 31, 16, 59, 59, tzinfo=timezone.utc)
+    # An explicit upper bound alone keeps expired opportunities in the window
+    assert resolve_list_window('deadline', None, '2026-03-31', now=NOW)[1] is None
+
+@pytest.mark.parametrize('args', [
+    ('popularity', None, None),
+    ('createdAt', '2026-03-01', None),
+    (None, '2026-04-01', '2026-03-01'),
+    (None, 'next week', None),
+])
+def test_invalid_list_arguments_are_rejected(args):
+    with pytest.raises(ValueError):
+        resolve_list_window(*args, now=NOW)
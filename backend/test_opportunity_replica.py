@@ -0,0 +1,134 @@
+"""
+Tests for the in-memory opportunity replica against a local fake snapshot listener
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.opportunity_replica import OpportunityReplica
+
+class FakeDocument:
+    """Minimal stand-in for a Firestore DocumentSnapshot"""
+
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+class FakeSnapshotSource:
+    """Local replacement for a Firestore query's on_snapshot listener"""
+
+    def __init__(self):
+        self.callback = None
+        self.unsubscribed = False
+
+    def on_snapshot(self, callback):
+        self.callback = callback
+        return self
+
+    def unsubscribe(self):
+        self.unsubscribed = True
+
+    def emit(self, *changes):
+        """Deliver (change_type, doc_id, data) tuples to the listener"""
+        events = [
+            SimpleNamespace(type=SimpleNamespace(name=change_type), document=FakeDocument(doc_id, data or {}))
+            for change_type, doc_id, data in changes
+        ]
+        self.callback([], events, None)
+
+def _started_replica():
+    source = FakeSnapshotSource()
+    replica = OpportunityReplica(source_factory=lambda: source)
+    replica.start()
+    return source, replica
+
+def test_ready_after_initial_snapshot():
+    source, replica = _started_replica()
+    assert not replica.is_ready
+    source.emit(
+        ('ADDED', 'opp-1', {'title': 'First', 'status': 'published'}),
+        ('ADDED', 'opp-2', {'title': 'Second', 'status': 'published'})
+    )
+    assert replica.is_ready
+    assert len(replica) == 2
+
+def test_incremental_changes_are_applied():
+    source, replica = _started_replica()
+    source.emit(
+        ('ADDED', 'opp-1', {'title': 'First', 'status': 'published'}),
+        ('ADDED', 'opp-2', {'title': 'Second', 'status': 'published'})
+    )
+    version = replica.version
+    source.emit(
+        ('MODIFIED', 'opp-1', {'title': 'First (edited)', 'status': 'published'}),
+        ('REMOVED', 'opp-2', None)
+    )
+    assert replica.get('opp-1')['title'] == 'First (edited)'
+    assert replica.get('opp-1')['id'] == 'opp-1'
+    assert replica.get('opp-2') is None
+    assert replica.version > version
+
+def test_returned_data_is_a_copy():
+    source, replica = _started_replica()
+    source.emit(('ADDED', 'opp-1', {'title': 'First', 'status': 'published'}))
+    replica.get('opp-1')['title'] = 'Mutated'
+    assert replica.get('opp-1')['title'] == 'First'
+
+def test_stop_detaches_listener_and_clears():
+    source, replica = _started_replica()
+    source.emit(('ADDED', 'opp-1', {'title': 'First', 'status': 'published'}))
+    replica.stop()
+    assert source.unsubscribed
+    assert not replica.is_ready and len(replica) == 0
+
+def test_resubscribes_after_the_listener_dies():
+    sources = []
+
+    def factory():
+        sources.append(FakeSnapshotSource())
+        return sources[-1]
+
+    replica = OpportunityReplica(source_factory=factory)
+    replica.start()
+    sources[0].emit(('ADDED', 'opp-1', {'title': 'First', 'status': 'published'}))
+    assert replica.check_listener() and len(sources) == 1
+
+    sources[0].is_active = False
+    assert replica.check_listener()
+    assert sources[0].unsubscribed and len(sources) == 2
+    assert not replica.is_ready and replica.collection_version() is None
+
+    sources[1].emit(('ADDED', 'opp-2', {'title': 'Second', 'status': 'published'}))
+    assert replica.is_ready
+    assert replica.get('opp-1') is None and replica.get('opp-2') is not None
+    replica.stop()
+
+def test_unapplied_snapshot_clears_ready_until_resubscribed():
+    sources = []
+
+    def factory():
+        sources.append(FakeSnapshotSource())
+        return sources[-1]
+
+    replica = OpportunityReplica(source_factory=factory)
+    replica.start()
+    sources[0].emit(('ADDED', 'opp-1', {'title': 'First', 'status': 'published'}))
+    sources[0].callback([], [None], None)  # Malformed change
+    assert not replica.is_ready
+
+    # The supervisor wakes up and resubscribes without waiting for its interval
+    deadline = time.monotonic() + 5
+    while not (len(sources) == 2 and sources[1].callback) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(sources) == 2 and sources[0].unsubscribed
+    sources[1].emit(('ADDED', 'opp-1', {'title': 'First', 'status': 'published'}))
+    assert replica.is_ready and len(replica) == 1
+    replica.stop()
@@ -0,0 +1,60 @@
+"""
+Tests for the local profanity pre-filter used ahead of Gemini moderation
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.profanity_filter import AhoCorasick, profanity_filter
+
+def test_aho_corasick_matches_naive_search():
+    rng = random.Random(7)
+    patterns = {''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(20)}
+    matcher = AhoCorasick({pattern: pattern for pattern in patterns})
+    for _ in range(200):
+        text = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 30)))
+        expected = sorted(
+            (i, i + len(p), p) for p in patterns
+            for i in range(len(text) - len(p) + 1) if text.startswith(p, i)
+        )
+        assert sorted(matcher.iter_matches(text)) == expected, text
+
+@pytest.mark.parametrize('text', [
+    "what the fuck", "Dasar k0nt0l!", "fuuuuck", "f u c k this", "ngentotin", "BULLSHIT",
+])
+def test_clear_profanity_is_rejected(text):
+    result = profanity_filter.screen({'description': text})
+    assert result.verdict == 'reject', result
+
+@pytest.mark.parametrize('text', [
+    "Program beasiswa penuh untuk siswa SMA", "Scunthorpe class assessment",
+    "Kami menjual shiitake dan cokelat di pantai", "Hubungi info@depanku.id",
+    "Hadiah Rp 5.000.000 untuk 10 peserta",
+])
+def test_embedded_substrings_stay_clean(text):
+    result = profanity_filter.screen({'description': text})
+    assert result.verdict == 'clean', result
+
+@pytest.mark.parametrize('text', [
+    "Festival kue pukis di Bandung", "Jual kue PUKIS dan kue cucur", "Lomba foto cocker spaniel",
+    "Asuransi kesehatan untuk relawan", "Pantai Kuta dan Taiwan", "Bangsa Indonesia memeriahkan HUT RI",
+    "Kelas membuat lontong dan tempe", "Kompetisi pantun dan puisi", "Diskon Cokes untuk peserta",
+    "Paduan suara Gereja Pantekosta", "Lomba memekarkan bunga anggrek",
+])
+def test_benign_words_are_not_rejected(text):
+    result = profanity_filter.screen({'description': text})
+    assert result.verdict != 'reject', result
+
+@pytest.mark.parametrize('text', [
+    "Pelatihan anjing pelacak", "what the f**k",
+    "shithole", "sh1thole", "fuckwit", "fuckoff", "bitchass", "clusterfuck", "horseshit", "dumbass",
+])
+def test_context_dependent_and_masked_words_are_ambiguous(text):
+    result = profanity_filter.screen({'title': text})
+    assert result.verdict == 'ambiguous' and result.signals, result
@@ -0,0 +1,74 @@
+"""
+Tests for the precomputed related opportunities index
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import related_service
+from services.related_service import RelatedIndex
+
+TAGS = ['ai', 'design', 'stem', 'art', 'music', 'sport']
+
+def _docs(count, seed=3):
+    rng = random.Random(seed)
+    return [{'id': f'opp-{i}', 'tags': rng.sample(TAGS, rng.randint(1, 3)),
+             'organization': rng.choice(['UI', 'ITB', 'UGM']), 'type': rng.choice(['competition', 'scholarship'])}
+            for i in range(count)]
+
+def _scores(index, doc_id):
+    return [score for _, score in index.get_related(doc_id)]
+
+def test_incremental_updates_match_a_rebuild():
+    docs = _docs(40)
+    index = RelatedIndex(top_k=5)
+    index.rebuild(docs[:30])
+    for doc in docs[30:]:
+        index.upsert(doc)
+    index.upsert({**docs[0], 'tags': ['music']})
+    index.remove('opp-1')
+
+    expected = RelatedIndex(top_k=5)
+    expected.rebuild([{**docs[0], 'tags': ['music']}] + docs[2:])
+    assert len(index) == len(expected) == 39
+    for doc in docs[2:]:
+        assert _scores(index, doc['id']) == _scores(expected, doc['id']), doc['id']
+
+def test_candidates_per_feature_are_capped(monkeypatch):
+    monkeypatch.setattr(related_service, 'MAX_CANDIDATES_PER_FEATURE', 5)
+    index = RelatedIndex()
+    index.rebuild({'id': f'opp-{i}', 'tags': ['popular']} for i in range(50))
+    assert len(index._candidates('opp-0')) <= 5
+
+def test_reads_do_not_wait_for_writers():
+    index = RelatedIndex()
+    index.rebuild(_docs(10))
+    result = []
+    with index._write_lock:
+        reader = threading.Thread(target=lambda: result.append(index.get_related('opp-0')))
+        reader.start()
+        reader.join(1)
+        assert result, "get_related blocked on the write lock"
+
+def test_background_build_retries_failed_loads():
+    attempts = []
+
+    def loader():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("firestore unavailable")
+        return _docs(5)
+
+    index = RelatedIndex()
+    index.start_background_build(loader, retry_delay=0.01)
+    deadline = time.monotonic() + 5
+    while not index.is_built and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.is_built and len(index) == 5
+    assert len(attempts) == 3
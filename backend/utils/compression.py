@@ -0,0 +1,119 @@
+"""Precompressed JSON responses cached per (endpoint, version, encoding)"""
+import gzip
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+from flask import request, current_app
+from utils.http_cache import is_not_modified, not_modified_response, set_validators
+from utils.logging_config import logger
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    brotli = None
+
+def negotiate_encoding() -> str:
+    """Pick the best content encoding the client accepts: br, gzip or identity"""
+    offers = ['br', 'gzip', 'identity'] if BROTLI_AVAILABLE else ['gzip', 'identity']
+    return request.accept_encodings.best_match(offers, default='identity') or 'identity'
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=9)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+class CompressedResponseCache:
+    """
+    Keeps encoded response bodies for the latest version of each endpoint.
+
+    Storing a new version for an endpoint drops every body of the previous
+    version, and the least recently used endpoints are evicted past max_endpoints.
+    """
+
+    def __init__(self, max_endpoints: int = 256):
+        self.max_endpoints = max_endpoints
+        # Store: {endpoint: (version, {encoding: body})}
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, endpoint: Hashable, version: str, encoding: str,
+                     build_payload: Callable[[], Any]) -> bytes:
+        """Return the encoded body, serializing and compressing at most once per version"""
+        with self._lock:
+            entry = self._entries.get(endpoint)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(endpoint)
+                bodies = entry[1]
+                if encoding in bodies:
+                    return bodies[encoding]
+                identity = bodies.get('identity')
+            else:
+                identity = None
+
+        if identity is None:
+            identity = current_app.json.dumps(build_payload()).encode('utf-8')
+        body = _compress(identity, encoding)
+
+        with self._lock:
+            entry = self._entries.get(endpoint)
+            if not entry or entry[0] != version:
+                entry = (version, {})
+                self._entries[endpoint] = entry
+            entry[1]['identity'] = identity
+            entry[1][encoding] = body
+            self._entries.move_to_end(endpoint)
+            while len(self._entries) > self.max_endpoints:
+                self._entries.popitem(last=False)
+
+        if encoding != 'identity':
+            logger.debug(f"Compressed {endpoint} v{version} with {encoding}: {len(identity)} -> {len(body)} bytes")
+        return body
+
+    def invalidate(self, endpoint: Hashable):
+        """Drop all bodies for an endpoint"""
+        with self._lock:
+            self._entries.pop(endpoint, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of cached endpoints and bytes held"""
+        with self._lock:
+            return {
+                'endpoints': len(self._entries),
+                'bytes': sum(len(body) for _, bodies in self._entries.values() for body in bodies.values())
+            }
+
+# Global cache instance
+response_cache = CompressedResponseCache()
+
+def cached_json_response(endpoint: Hashable, version: str, build_payload: Callable[[], Any],
+                         etag: Optional[str] = None, last_modified: Optional[datetime] = None):
+    """
+    Serve a versioned JSON payload, precompressed for the negotiated encoding
+
+    build_payload is only called when no body for this (endpoint, version) has
+    been cached yet. ETags are suffixed per encoding so each representation
+    keeps its own strong validator.
+
+    Example:
+        return cached_json_response('templates', TEMPLATES_ETAG, lambda: {...}, etag=TEMPLATES_ETAG)
+    """
+    encoding = negotiate_encoding()
+    if encoding != 'identity' and etag:
+        etag = f"{etag}-{encoding}"
+
+    if is_not_modified(etag, last_modified):
+        # Same Vary as the 200 so caches keep the representations apart
+        response = not_modified_response(etag, last_modified)
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    body = response_cache.get_or_build(endpoint, version, encoding, build_payload)
+    response = current_app.response_class(body, mimetype='application/json')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return set_validators(response, etag, last_modified)
@@ -36,3 +36,29 @@ def require_auth(f):
     
     return decorated_function
 
+def optional_auth(f):
+    """Decorator that injects user info when a valid token is sent, None otherwise"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user_id = None
+        user_email = None
+        
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            id_token = auth_header.split('Bearer ')[1]
+            try:
+                decoded_token = auth.verify_id_token(id_token)
+                user_id = decoded_token['uid']
+                user_email = decoded_token.get('email', '')
+            except Exception:
+                return jsonify({
+                    "success": False,
+                    "message": "Invalid token"
+                }), 401
+        
+        request.user_id = user_id
+        request.user_email = user_email
+        
+        return f(user_id=user_id, user_email=user_email, *args, **kwargs)
+    
+    return decorated_function
@@ -0,0 +1,61 @@
+"""Conditional GET helpers (ETag / If-None-Match / Last-Modified)"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Optional
+from flask import request, jsonify, make_response
+
+def compute_etag(payload: Any) -> str:
+    """Compute a strong ETag value from JSON-serializable content"""
+    raw = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+def _to_http_datetime(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalize a timestamp for HTTP date comparison (UTC, second precision)"""
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+def is_not_modified(etag: Optional[str] = None, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Check the current request's validators
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    """
+    if etag and request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    last_modified = _to_http_datetime(last_modified)
+    if last_modified and request.if_modified_since:
+        return last_modified <= request.if_modified_since
+
+    return False
+
+def set_validators(response, etag: Optional[str], last_modified: Optional[datetime]):
+    """Attach ETag, Last-Modified and revalidation headers to a response"""
+    if etag:
+        response.set_etag(etag)
+    last_modified = _to_http_datetime(last_modified)
+    if last_modified:
+        response.last_modified = last_modified
+    # Let browsers and the frontend keep the body but always revalidate
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def not_modified_response(etag: Optional[str] = None, last_modified: Optional[datetime] = None):
+    """Build an empty 304 Not Modified response carrying the validators"""
+    return set_validators(make_response('', 304), etag, last_modified)
+
+def conditional_json(payload: Any, etag: Optional[str] = None,
+                     last_modified: Optional[datetime] = None, status_code: int = 200):
+    """
+    Return payload as JSON with validators, or 304 if the client's copy is current
+
+    Example:
+        return conditional_json({"success": True, "data": data}, etag=compute_etag(data))
+    """
+    if is_not_modified(etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    return set_validators(make_response(jsonify(payload), status_code), etag, last_modified)
@@ -0,0 +1,27 @@
+"""Opaque page cursors for keyset pagination"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the last document's ordering values as an opaque page cursor"""
+    values = [{'$ts': v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a page cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or not values:
+            raise ValueError("cursor must be a non-empty list")
+        return [datetime.fromisoformat(v['$ts']) if isinstance(v, dict) and '$ts' in v else v for v in values]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e